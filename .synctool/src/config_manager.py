@@ -45,13 +45,20 @@ class ConfigManager:
             
             # 监视配置
             'debounce_delay': 0.8,  # 去抖动延迟（秒）
+            'debounce_max_wait': 5.0,  # 持续变化的文件最长等待时间（秒）
+            'debounce_ms': 300,  # 同一文件重复事件的合并窗口（毫秒），不得超过 debounce_delay
             'watch_interval': 1.0,  # 监视间隔（秒）
+            'force_polling': False,  # 强制使用轮询监控（默认仅在网络文件系统/WSL下轮询）
+            'parallel_scan': True,  # 轮询模式启动时并行扫描子目录
+            'event_workers': 4,  # 处理文件变更事件的转换线程数
             
             # 同步配置
             'sync_on_start': True,  # 启动时执行同步
             'bidirectional_sync': True,  # 双向同步
             'conflict_resolution': 'newer',  # 冲突解决策略: newer, md, ipynb
             'delete_orphaned': True,  # 是否删除孤立文件
+            'initial_sync_workers': None,  # 初始同步的并行线程数，为空则按CPU核数自动选择
+            'cache_path': os.path.join(os.path.dirname(self.config_path), 'cache.json'),  # 文件状态缓存路径，为空则不使用缓存
             
             # 转换配置
             'default_language': 'python',  # 默认代码块语言
@@ -64,6 +71,7 @@ class ConfigManager:
         
         # 加载配置
         self.config = self.load_config()
+        self._refresh_dirs()
         
     def load_config(self):
         """加载配置文件
@@ -129,6 +137,8 @@ class ConfigManager:
             value: 配置项的值
         """
         self.config[key] = value
+        if key in ('md_dir', 'ipynb_dir'):
+            self._refresh_dirs()
         
     def update(self, config_dict):
         """更新多个配置项
@@ -137,6 +147,12 @@ class ConfigManager:
             config_dict (dict): 包含配置项的字典
         """
         self.config.update(config_dict)
+        self._refresh_dirs()
+    
+    def _refresh_dirs(self):
+        """根据当前配置重建缓存的目录Path对象"""
+        self._md_dir = Path(self.config['md_dir'])
+        self._ipynb_dir = Path(self.config['ipynb_dir'])
     
     def get_md_dir(self):
         """获取Markdown目录的Path对象
@@ -144,7 +160,7 @@ class ConfigManager:
         Returns:
             Path: Markdown目录
         """
-        return Path(self.get('md_dir'))
+        return self._md_dir
     
     def get_ipynb_dir(self):
         """获取Jupyter Notebook目录的Path对象
@@ -152,4 +168,4 @@ class ConfigManager:
         Returns:
             Path: Jupyter Notebook目录
         """
-        return Path(self.get('ipynb_dir'))
+        return self._ipynb_dir
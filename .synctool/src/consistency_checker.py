@@ -6,12 +6,13 @@
 
 import os
 import re
+import json
 import fnmatch
 from pathlib import Path
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
 
-from .utils import logger, Color, is_markdown_file, is_notebook_file
+from .utils import logger, Color
 
 class ConsistencyChecker:
     """一致性检查类"""
@@ -26,6 +27,23 @@ class ConsistencyChecker:
         self.md_dir = self.config.get_md_dir()
         self.ipynb_dir = self.config.get_ipynb_dir()
         self.ignore_patterns = self.config.get('ignore_patterns', [])
+        self.time_threshold = self.config.get('time_threshold', 5)  # 时间戳比较阈值，默认5秒
+        self._threshold_ns = int(self.time_threshold * 1000000000)
+        self.conflict_resolution = self.config.get('conflict_resolution')
+        self.delete_orphaned = self.config.get('delete_orphaned', False)
+        
+        # 文件状态缓存：上次同步完成后各文件的(mtime_ns, size)，用于跳过未变化的文件对
+        self.cache_path = self.config.get('cache_path')
+        self._prev = self.load_cache()
+        self._in_sync = {}
+        
+        # 将所有忽略模式预编译为一个正则表达式，每个条目只需匹配一次
+        if self.ignore_patterns:
+            self._ignore_re = re.compile('|'.join(
+                '(?:' + fnmatch.translate(os.path.normcase(p)) + ')' for p in self.ignore_patterns
+            ))
+        else:
+            self._ignore_re = None
         
     def is_ignored(self, path):
         """检查路径是否应被忽略
@@ -36,15 +54,69 @@ class ConsistencyChecker:
         Returns:
             bool: 是否应被忽略
         """
-        filename = os.path.basename(path)
-        
+        if self._ignore_re is None:
+            return False
+            
         # 检查是否匹配任何忽略模式
-        for pattern in self.ignore_patterns:
-            if fnmatch.fnmatch(filename, pattern):
-                return True
-                
-        return False
+        return self._ignore_re.match(os.path.normcase(os.path.basename(path))) is not None
+        
+    def load_cache(self):
+        """加载文件状态缓存
+        
+        Returns:
+            dict: 键为相对路径，值为(mtime_ns, size)元组
+        """
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+            
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return {rel_path: tuple(state) for rel_path, state in json.load(f).items()}
+        except Exception as e:
+            logger.warning(f"{Color.YELLOW}加载文件状态缓存失败，将重新检查所有文件: {e}{Color.RESET}")
+            return {}
+    
+    def save_cache(self, sync_actions):
+        """同步完成后保存文件状态缓存
+        
+        只记录确认已同步的文件对：本次检查中被判定为一致的文件对，
+        以及目标文件在同步后确实发生了变化的同步操作
         
+        Args:
+            sync_actions (dict): check_consistency返回的同步操作
+        """
+        if not self.cache_path:
+            return
+            
+        states = dict(self._in_sync)
+        directions = (
+            ('md_to_ipynb', self.md_dir, self.ipynb_dir),
+            ('ipynb_to_md', self.ipynb_dir, self.md_dir),
+        )
+        for key, source_dir, target_dir in directions:
+            for action in sync_actions[key]:
+                try:
+                    source_stat = os.stat(action['source'])
+                    target_stat = os.stat(action['target'])
+                except OSError:
+                    continue
+                    
+                # 目标文件未变化说明同步被跳过或失败，下次仍需检查
+                target_state = (target_stat.st_mtime_ns, target_stat.st_size)
+                if target_state == action.get('target_state'):
+                    continue
+                    
+                states[os.path.relpath(action['source'], source_dir)] = (source_stat.st_mtime_ns, source_stat.st_size)
+                states[os.path.relpath(action['target'], target_dir)] = target_state
+                
+        try:
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump(states, f, ensure_ascii=False)
+            self._prev = states
+            logger.debug("%s[缓存] 已保存 %s 个文件状态到: %s%s", Color.GRAY, len(states), self.cache_path, Color.RESET)
+        except Exception as e:
+            logger.error(f"{Color.RED}保存文件状态缓存失败: {e}{Color.RESET}")
+    
     def get_corresponding_path(self, path, source_dir, target_dir, target_ext):
         """获取对应的目标路径
         
@@ -64,15 +136,43 @@ class ConsistencyChecker:
         target_path = target_dir / rel_path.parent / (rel_path.stem + target_ext)
         return target_path
     
-    def scan_directory(self, directory, base_dir=None):
+    def _scan(self, directory, rel_dir='', suffix=None):
+        """递归扫描目录，产出未被忽略的文件条目
+        
+        Args:
+            directory (str or Path): 要扫描的目录
+            rel_dir (str): 该目录相对于基准目录的路径
+            suffix (str, optional): 只保留该扩展名的文件（小写，含点）
+            
+        Yields:
+            tuple: (相对路径, os.DirEntry)
+        """
+        suffix_len = len(suffix) if suffix else 0
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    # 跳过忽略的文件和目录
+                    if self.is_ignored(entry.name):
+                        continue
+                        
+                    rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from self._scan(entry.path, rel_path, suffix)
+                    elif (not suffix or entry.name[-suffix_len:].lower() == suffix) and entry.is_file():
+                        yield rel_path, entry
+        except OSError as e:
+            logger.warning(f"{Color.YELLOW}无法读取目录: {directory}, 错误: {e}{Color.RESET}")
+    
+    def scan_directory(self, directory, base_dir=None, suffix=None):
         """扫描目录并返回文件信息
         
         Args:
             directory (Path): 要扫描的目录
             base_dir (Path, optional): 基准目录，用于计算相对路径
+            suffix (str, optional): 只收集该扩展名的文件，如'.md'
             
         Returns:
-            dict: 文件信息字典，键为相对路径，值为文件信息
+            dict: 文件信息字典，键为相对路径，值为(路径, 修改时间, 大小)元组
         """
         if base_dir is None:
             base_dir = directory
@@ -84,39 +184,18 @@ class ConsistencyChecker:
             logger.warning(f"{Color.YELLOW}目录不存在: {directory}{Color.RESET}")
             return files_info
             
-        # 遍历目录
-        for root, dirs, files in os.walk(directory):
-            # 跳过忽略的目录
-            dirs[:] = [d for d in dirs if not self.is_ignored(os.path.join(root, d))]
+        # 计算起始目录相对于基准目录的路径前缀
+        rel_root = os.path.relpath(directory, base_dir)
+        if rel_root == os.curdir:
+            rel_root = ''
+            
+        # 遍历目录，每个文件只调用一次stat
+        for rel_path, entry in self._scan(directory, rel_root, suffix):
+            st = entry.stat()
+            
+            # 添加到文件信息字典，只保留后续会用到的字段
+            files_info[rel_path] = (entry.path, st.st_mtime_ns, st.st_size)
             
-            # 处理文件
-            for file in files:
-                file_path = Path(root) / file
-                
-                # 跳过忽略的文件
-                if self.is_ignored(file_path):
-                    continue
-                    
-                # 计算相对路径
-                rel_path = file_path.relative_to(base_dir)
-                
-                # 获取文件信息
-                if file_path.exists():
-                    mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                    size = file_path.stat().st_size
-                else:
-                    mtime = None
-                    size = 0
-                
-                # 添加到文件信息字典
-                files_info[str(rel_path)] = {
-                    'path': file_path,
-                    'rel_path': rel_path,
-                    'mtime': mtime,
-                    'size': size,
-                    'extension': file_path.suffix
-                }
-                
         return files_info
         
     def check_consistency(self):
@@ -125,12 +204,14 @@ class ConsistencyChecker:
         Returns:
             dict: 包含同步操作的字典
         """
-        # 扫描MD目录
-        md_files = self.scan_directory(self.md_dir)
+        # 并行扫描MD和IPYNB目录，两者的stat调用互不依赖
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            md_future = executor.submit(self.scan_directory, self.md_dir, suffix='.md')
+            ipynb_future = executor.submit(self.scan_directory, self.ipynb_dir, suffix='.ipynb')
+            md_files = md_future.result()
+            ipynb_files = ipynb_future.result()
+            
         logger.info(f"{Color.BLUE}扫描到 {len(md_files)} 个 MD 文件{Color.RESET}")
-        
-        # 扫描IPYNB目录
-        ipynb_files = self.scan_directory(self.ipynb_dir)
         logger.info(f"{Color.BLUE}扫描到 {len(ipynb_files)} 个 IPYNB 文件{Color.RESET}")
         
         # 构建需要同步的文件列表
@@ -142,100 +223,107 @@ class ConsistencyChecker:
             'orphaned_ipynb': []  # 孤立的IPYNB文件
         }
         
+        # 重新收集本次检查中一致的文件对
+        self._in_sync = {}
+        
         # 检查MD文件对应的IPYNB文件
         for rel_path, md_info in md_files.items():
-            if not is_markdown_file(str(md_info['path'])):
-                continue
-                
-            # 计算对应的IPYNB路径
-            rel_ipynb_path = str(Path(rel_path).parent / (Path(rel_path).stem + '.ipynb'))
+            # 计算对应的IPYNB路径（直接替换扩展名）
+            rel_ipynb_path = rel_path[:-3] + '.ipynb'
             
             if rel_ipynb_path in ipynb_files:
                 # 文件在两边都存在，检查修改时间决定同步方向
-                md_mtime = md_info['mtime']
-                ipynb_mtime = ipynb_files[rel_ipynb_path]['mtime']
+                ipynb_info = ipynb_files[rel_ipynb_path]
+                md_mtime = md_info[1]
+                ipynb_mtime = ipynb_info[1]
+                md_state = (md_mtime, md_info[2])
+                ipynb_state = (ipynb_mtime, ipynb_info[2])
                 
-                # 计算时间差的绝对值(秒)
-                time_diff = abs((md_mtime - ipynb_mtime).total_seconds())
+                # 两个文件自上次同步后都未变化，无需再比较
+                if self._prev.get(rel_path) == md_state and self._prev.get(rel_ipynb_path) == ipynb_state:
+                    self._in_sync[rel_path] = md_state
+                    self._in_sync[rel_ipynb_path] = ipynb_state
+                    logger.debug("%s[跳过同步] 文件自上次同步后未变化: %s ↔ %s%s", Color.GRAY, rel_path, rel_ipynb_path, Color.RESET)
+                    continue
+                
+                # 计算时间差的绝对值(纳秒整数)，只在需要展示时换算为秒
+                diff_ns = abs(md_mtime - ipynb_mtime)
+                time_diff = diff_ns / 1e9
                 
                 # 如果时间差小于阈值，认为文件是同步的，避免因同步操作导致的时间戳轻微变化
-                time_threshold = self.config.get('time_threshold', 5)  # 使用配置中的阈值，默认5秒
-                if time_diff < time_threshold:
+                if diff_ns < self._threshold_ns:
+                    self._in_sync[rel_path] = md_state
+                    self._in_sync[rel_ipynb_path] = ipynb_state
                     logger.info(f"{Color.YELLOW}[跳过同步] 文件时间戳相近(差异{time_diff:.2f}秒): {rel_path} ↔ {rel_ipynb_path}{Color.RESET}")
                     continue
                 
                 # 日志记录时间差，便于调试
-                logger.debug(f"{Color.GRAY}[时间差] {rel_path} ↔ {rel_ipynb_path} 时间差: {time_diff:.2f}秒, MD: {md_mtime}, IPYNB: {ipynb_mtime}{Color.RESET}")
+                logger.debug("%s[时间差] %s ↔ %s 时间差: %.2f秒, MD: %s, IPYNB: %s%s", Color.GRAY, rel_path, rel_ipynb_path, time_diff, md_mtime, ipynb_mtime, Color.RESET)
                 
                 # 如果MD文件较新，或者配置指定优先使用MD文件
-                if (md_mtime > ipynb_mtime) or self.config.get('conflict_resolution') == 'md':
+                if (md_mtime > ipynb_mtime) or self.conflict_resolution == 'md':
                     sync_actions['md_to_ipynb'].append({
-                        'source': md_info['path'],
-                        'target': ipynb_files[rel_ipynb_path]['path'],
+                        'source': Path(md_info[0]),
+                        'target': Path(ipynb_info[0]),
+                        'target_state': ipynb_state,
                         'rel_path': rel_path,
                         'time_diff': time_diff
                     })
-                    logger.debug(f"{Color.BLUE}[同步方向] MD → IPYNB ({time_diff:.2f}秒): {rel_path}{Color.RESET}")
+                    logger.debug("%s[同步方向] MD → IPYNB (%.2f秒): %s%s", Color.BLUE, time_diff, rel_path, Color.RESET)
                 # 如果IPYNB文件较新，或者配置指定优先使用IPYNB文件
-                elif (md_mtime < ipynb_mtime) or self.config.get('conflict_resolution') == 'ipynb':
+                elif (md_mtime < ipynb_mtime) or self.conflict_resolution == 'ipynb':
                     sync_actions['ipynb_to_md'].append({
-                        'source': ipynb_files[rel_ipynb_path]['path'],
-                        'target': md_info['path'],
+                        'source': Path(ipynb_info[0]),
+                        'target': Path(md_info[0]),
+                        'target_state': md_state,
                         'rel_path': rel_ipynb_path,
                         'time_diff': time_diff
                     })
-                    logger.debug(f"{Color.BLUE}[同步方向] IPYNB → MD ({time_diff:.2f}秒): {rel_ipynb_path}{Color.RESET}")
+                    logger.debug("%s[同步方向] IPYNB → MD (%.2f秒): %s%s", Color.BLUE, time_diff, rel_ipynb_path, Color.RESET)
             else:
                 # IPYNB文件不存在，添加到MD->IPYNB同步列表
-                ipynb_path = self.get_corresponding_path(md_info['path'], self.md_dir, self.ipynb_dir, '.ipynb')
                 sync_actions['md_to_ipynb'].append({
-                    'source': md_info['path'],
-                    'target': ipynb_path,
+                    'source': Path(md_info[0]),
+                    'target': self.ipynb_dir / rel_ipynb_path,
                     'rel_path': rel_path,
                     'time_diff': float('inf')  # 无对应文件，时间差设为无穷大
                 })
-                logger.debug(f"{Color.BLUE}[单向同步] MD → IPYNB (新文件): {rel_path}{Color.RESET}")
+                logger.debug("%s[单向同步] MD → IPYNB (新文件): %s%s", Color.BLUE, rel_path, Color.RESET)
         
         # 检查IPYNB文件对应的MD文件
         for rel_path, ipynb_info in ipynb_files.items():
-            if not is_notebook_file(str(ipynb_info['path'])):
-                continue
-                
-            # 计算对应的MD路径
-            rel_md_path = str(Path(rel_path).parent / (Path(rel_path).stem + '.md'))
+            # 计算对应的MD路径（直接替换扩展名）
+            rel_md_path = rel_path[:-6] + '.md'
             
             if rel_md_path not in md_files:
                 # MD文件不存在，添加到IPYNB->MD同步列表
-                md_path = self.get_corresponding_path(ipynb_info['path'], self.ipynb_dir, self.md_dir, '.md')
                 sync_actions['ipynb_to_md'].append({
-                    'source': ipynb_info['path'],
-                    'target': md_path,
+                    'source': Path(ipynb_info[0]),
+                    'target': self.md_dir / rel_md_path,
                     'rel_path': rel_path,
                     'time_diff': float('inf')  # 无对应文件，时间差设为无穷大
                 })
-                logger.debug(f"{Color.BLUE}[单向同步] IPYNB → MD (新文件): {rel_path}{Color.RESET}")
+                logger.debug("%s[单向同步] IPYNB → MD (新文件): %s%s", Color.BLUE, rel_path, Color.RESET)
         
         # 标记孤立文件
-        if self.config.get('delete_orphaned', False):
+        if self.delete_orphaned:
+            # 预先收集已计划同步的相对路径，便于O(1)查找
+            md_sync_set = {action['rel_path'] for action in sync_actions['md_to_ipynb']}
+            ipynb_sync_set = {action['rel_path'] for action in sync_actions['ipynb_to_md']}
+            
             # 检查孤立的MD文件
             for rel_path, md_info in md_files.items():
-                if not is_markdown_file(str(md_info['path'])):
-                    continue
-                    
-                rel_ipynb_path = str(Path(rel_path).parent / (Path(rel_path).stem + '.ipynb'))
-                if rel_ipynb_path not in ipynb_files and not any(action['rel_path'] == rel_path for action in sync_actions['md_to_ipynb']):
-                    sync_actions['orphaned_md'].append(md_info['path'])
-                    logger.debug(f"{Color.RED}[孤立文件] MD: {rel_path}{Color.RESET}")
+                rel_ipynb_path = rel_path[:-3] + '.ipynb'
+                if rel_ipynb_path not in ipynb_files and rel_path not in md_sync_set:
+                    sync_actions['orphaned_md'].append(md_info[0])
+                    logger.debug("%s[孤立文件] MD: %s%s", Color.RED, rel_path, Color.RESET)
             
             # 检查孤立的IPYNB文件
             for rel_path, ipynb_info in ipynb_files.items():
-                if not is_notebook_file(str(ipynb_info['path'])):
-                    continue
-                    
-                rel_md_path = str(Path(rel_path).parent / (Path(rel_path).stem + '.md'))
-                if rel_md_path not in md_files and not any(action['rel_path'] == rel_path for action in sync_actions['ipynb_to_md']):
-                    sync_actions['orphaned_ipynb'].append(ipynb_info['path'])
-                    logger.debug(f"{Color.RED}[孤立文件] IPYNB: {rel_path}{Color.RESET}")
+                rel_md_path = rel_path[:-6] + '.md'
+                if rel_md_path not in md_files and rel_path not in ipynb_sync_set:
+                    sync_actions['orphaned_ipynb'].append(ipynb_info[0])
+                    logger.debug("%s[孤立文件] IPYNB: %s%s", Color.RED, rel_path, Color.RESET)
         
         # 统计需要同步的文件数量
         md_to_ipynb_count = len(sync_actions['md_to_ipynb'])
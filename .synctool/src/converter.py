@@ -8,11 +8,107 @@ import os
 import re
 import json
 import uuid
+import hashlib
+import functools
 from pathlib import Path
 from datetime import datetime
 
 from .utils import logger, Color, ensure_dir_exists
 
+try:
+    import orjson  # 可选依赖，更快的JSON解析和序列化
+except ImportError:
+    orjson = None
+
+try:
+    import json_stream  # 可选依赖，用于流式解析大型Notebook
+except ImportError:
+    json_stream = None
+
+try:
+    import xxhash  # 可选依赖，更快的内容哈希
+except ImportError:
+    xxhash = None
+
+# 未开启保留输出且未安装orjson时，超过该大小（字节）的Notebook使用流式解析
+STREAM_PARSE_MIN_SIZE = 64 * 1024
+
+# 生成的Notebook元数据，所有转换共用同一份，只在序列化时读取
+NOTEBOOK_METADATA = {
+    'kernelspec': {
+        'display_name': 'Python 3',
+        'language': 'python',
+        'name': 'python3'
+    },
+    'language_info': {
+        'codemirror_mode': {
+            'name': 'ipython',
+            'version': 3
+        },
+        'file_extension': '.py',
+        'mimetype': 'text/x-python',
+        'name': 'python',
+        'nbconvert_exporter': 'python',
+        'pygments_lexer': 'ipython3',
+        'version': '3.8.0'
+    }
+}
+
+# 输出内容转为注释时使用的换行替换
+_NL = '\n'
+_NL_HASH = '\n# '
+
+# 代码语言特征，按顺序匹配，命中第一个即返回
+_LANG_PATTERNS = [
+    ('python', re.compile(r'import\s+[\w.]+|def\s+\w+\s*\(|class\s+\w+\s*:')),
+    ('javascript', re.compile(r'var\s+\w+|let\s+\w+|const\s+\w+|function\s+\w+\s*\(|=>\s*{')),
+    ('java', re.compile(r'public\s+class|private\s+\w+|protected\s+\w+')),
+    ('cpp', re.compile(r'#include\s+[<"]|int\s+main\s*\(')),
+    ('bash', re.compile(r'^#!/bin/bash|^\s*for\s+\w+\s+in\s+|^\s*if\s+\[\[')),
+]
+
+
+def _content_hash(data):
+    """计算文件内容的哈希值，优先使用xxh3，否则使用blake2b
+    
+    Args:
+        data (bytes): 文件内容
+        
+    Returns:
+        bytes: 哈希摘要
+    """
+    if xxhash is not None:
+        return xxhash.xxh3_64_digest(data)
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def _loads_json(content):
+    """解析JSON字节，优先使用orjson
+    
+    orjson不接受NaN/Infinity等nbformat和标准库json都能读写的字面量，
+    orjson解析失败时再用标准库json解析，两者都失败才抛出异常
+    
+    Args:
+        content (bytes): JSON内容
+        
+    Returns:
+        解析后的对象
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(content)
+
+@functools.lru_cache(maxsize=256)
+def _ensure_parent(dir_str):
+    """确保目标目录存在，同一目录在缓存命中时不再重复检查
+    
+    Args:
+        dir_str (str): 目录路径
+    """
+    ensure_dir_exists(dir_str)
+
 class Converter:
     """文件转换器类"""
     
@@ -27,6 +123,10 @@ class Converter:
         self.preserve_output = self.config.get('preserve_output', True)
         self.execution_count = self.config.get('execution_count', True)
         
+        # 本进程写入过的目标文件：路径 -> (修改时间ns, 大小, 内容哈希)
+        # 目标文件未被外部修改时无需重新读取即可比较内容
+        self._hash_cache = {}
+        
     def md_to_ipynb(self, md_path, ipynb_path=None):
         """将Markdown文件转换为Jupyter Notebook
         
@@ -48,7 +148,7 @@ class Converter:
         logger.info(f"{Color.GREEN}转换 MD → IPYNB: {md_path} → {ipynb_path}{Color.RESET}")
         
         # 确保目标目录存在
-        ensure_dir_exists(ipynb_path.parent)
+        _ensure_parent(str(ipynb_path.parent))
         
         try:
             # 读取Markdown文件内容
@@ -60,48 +160,31 @@ class Converter:
             access_time = source_stat.st_atime
             modify_time = source_stat.st_mtime
             
-            # 初始化Notebook结构
+            # 解析Markdown内容，创建cells；元数据使用共享的模块常量，只序列化不修改
             notebook = {
-                'cells': [],
-                'metadata': {
-                    'kernelspec': {
-                        'display_name': 'Python 3',
-                        'language': 'python',
-                        'name': 'python3'
-                    },
-                    'language_info': {
-                        'codemirror_mode': {
-                            'name': 'ipython',
-                            'version': 3
-                        },
-                        'file_extension': '.py',
-                        'mimetype': 'text/x-python',
-                        'name': 'python',
-                        'nbconvert_exporter': 'python',
-                        'pygments_lexer': 'ipython3',
-                        'version': '3.8.0'
-                    }
-                },
+                'cells': self.parse_md_to_cells(md_content),
+                'metadata': NOTEBOOK_METADATA,
                 'nbformat': 4,
                 'nbformat_minor': 4
             }
             
-            # 解析Markdown内容，创建cells
-            cells = self.parse_md_to_cells(md_content)
-            notebook['cells'] = cells
-            
-            # 写入Jupyter Notebook文件
-            with open(ipynb_path, 'w', encoding='utf-8') as f:
-                json.dump(notebook, f, indent=2, ensure_ascii=False)
+            # 序列化为UTF-8字节后直接写入，跳过文本层的编码
+            if orjson is not None:
+                data = orjson.dumps(notebook, option=orjson.OPT_INDENT_2)
+            else:
+                data = json.dumps(notebook, indent=2, ensure_ascii=False).encode('utf-8')
             
-            # 设置目标文件的时间戳与源文件一致
-            os.utime(ipynb_path, (access_time, modify_time))
-            logger.debug(f"{Color.BLUE}[时间戳同步] {ipynb_path} 的时间戳已与 {md_path} 同步{Color.RESET}")
+            # 写入Jupyter Notebook文件，内容未变化时只同步时间戳
+            self.write_if_changed(ipynb_path, data, (access_time, modify_time))
+            logger.debug("%s[时间戳同步] %s 的时间戳已与 %s 同步%s", Color.BLUE, ipynb_path, md_path, Color.RESET)
             
             logger.info(f"{Color.BLUE}转换成功: {ipynb_path}{Color.RESET}")
             return ipynb_path
             
         except Exception as e:
+            if isinstance(e, FileNotFoundError):
+                # 目标目录可能已被删除，清空缓存以便下次重新创建
+                _ensure_parent.cache_clear()
             logger.error(f"{Color.RED}转换失败 MD → IPYNB: {md_path} → {ipynb_path}, 错误: {e}{Color.RESET}")
             raise
     
@@ -126,7 +209,7 @@ class Converter:
         logger.info(f"{Color.GREEN}转换 IPYNB → MD: {ipynb_path} → {md_path}{Color.RESET}")
         
         # 确保目标目录存在
-        ensure_dir_exists(md_path.parent)
+        _ensure_parent(str(md_path.parent))
         
         try:
             # 获取源文件的访问时间和修改时间
@@ -135,62 +218,157 @@ class Converter:
             modify_time = source_stat.st_mtime
             
             # 检查文件大小
-            if ipynb_path.stat().st_size == 0:
+            if source_stat.st_size == 0:
                 logger.warning(f"{Color.YELLOW}IPYNB文件为空: {ipynb_path}{Color.RESET}")
-                # 创建一个空的Markdown文件
-                with open(md_path, 'w', encoding='utf-8') as f:
-                    f.write('')
-                # 设置目标文件的时间戳与源文件一致
-                os.utime(md_path, (access_time, modify_time))
-                logger.debug(f"{Color.BLUE}[时间戳同步] {md_path} 的时间戳已与 {ipynb_path} 同步{Color.RESET}")
+                # 创建一个空的Markdown文件，并设置时间戳与源文件一致
+                self.write_if_changed(md_path, b'', (access_time, modify_time))
+                logger.debug("%s[时间戳同步] %s 的时间戳已与 %s 同步%s", Color.BLUE, md_path, ipynb_path, Color.RESET)
                 logger.info(f"{Color.BLUE}已创建空的MD文件: {md_path}{Color.RESET}")
                 return md_path
             
             # 读取Jupyter Notebook文件内容
             try:
-                with open(ipynb_path, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if not content:
-                        # 处理空内容但文件不为0字节的情况
-                        logger.warning(f"{Color.YELLOW}IPYNB文件内容为空: {ipynb_path}{Color.RESET}")
-                        with open(md_path, 'w', encoding='utf-8') as mf:
-                            mf.write('')
-                        # 设置目标文件的时间戳与源文件一致
-                        os.utime(md_path, (access_time, modify_time))
-                        logger.debug(f"{Color.BLUE}[时间戳同步] {md_path} 的时间戳已与 {ipynb_path} 同步{Color.RESET}")
-                        logger.info(f"{Color.BLUE}已创建空的MD文件: {md_path}{Color.RESET}")
-                        return md_path
+                if (json_stream is not None and orjson is None and not self.preserve_output
+                        and source_stat.st_size >= STREAM_PARSE_MIN_SIZE):
+                    # 不保留输出时大文件流式解析，跳过的outputs不会载入内存；
+                    # 保留输出时所有数据都要载入，流式解析只会更慢，安装了orjson时也直接使用orjson
+                    with open(ipynb_path, 'rb') as f:
+                        try:
+                            notebook = self.load_notebook_streaming(f)
+                        except StopIteration:
+                            # 文件只包含空白时流式解析读不到任何JSON值
+                            notebook = None
+                else:
+                    # 以字节读取，省去先解码再交给解析器的过程
+                    with open(ipynb_path, 'rb') as f:
+                        content = f.read().strip()
+                    notebook = _loads_json(content) if content else None
                     
-                    notebook = json.loads(content)
-            except json.JSONDecodeError as je:
+                if notebook is None:
+                    # 处理空内容但文件不为0字节的情况
+                    logger.warning(f"{Color.YELLOW}IPYNB文件内容为空: {ipynb_path}{Color.RESET}")
+                    # 创建一个空的Markdown文件，并设置时间戳与源文件一致
+                    self.write_if_changed(md_path, b'', (access_time, modify_time))
+                    logger.debug("%s[时间戳同步] %s 的时间戳已与 %s 同步%s", Color.BLUE, md_path, ipynb_path, Color.RESET)
+                    logger.info(f"{Color.BLUE}已创建空的MD文件: {md_path}{Color.RESET}")
+                    return md_path
+            except ValueError as je:  # 包括json/orjson.JSONDecodeError和流式解析错误
                 logger.error(f"{Color.RED}IPYNB文件不是有效的JSON格式: {ipynb_path}, 错误: {je}{Color.RESET}")
-                # 创建一个包含错误信息的Markdown文件
-                with open(md_path, 'w', encoding='utf-8') as f:
-                    f.write(f"# 注意：原IPYNB文件格式有误\n\n原文件路径：{ipynb_path}\n\n错误信息：{je}")
-                # 设置目标文件的时间戳与源文件一致
-                os.utime(md_path, (access_time, modify_time))
-                logger.debug(f"{Color.BLUE}[时间戳同步] {md_path} 的时间戳已与 {ipynb_path} 同步{Color.RESET}")
+                # 创建一个包含错误信息的Markdown文件，并设置时间戳与源文件一致
+                error_content = f"# 注意：原IPYNB文件格式有误\n\n原文件路径：{ipynb_path}\n\n错误信息：{je}"
+                self.write_if_changed(md_path, self.encode_text(error_content), (access_time, modify_time))
+                logger.debug("%s[时间戳同步] %s 的时间戳已与 %s 同步%s", Color.BLUE, md_path, ipynb_path, Color.RESET)
                 logger.info(f"{Color.BLUE}已创建包含错误信息的MD文件: {md_path}{Color.RESET}")
                 return md_path
             
             # 将Notebook转换为Markdown
             md_content = self.convert_notebook_to_md(notebook)
             
-            # 写入Markdown文件
-            with open(md_path, 'w', encoding='utf-8') as f:
-                f.write(md_content)
-            
-            # 设置目标文件的时间戳与源文件一致
-            os.utime(md_path, (access_time, modify_time))
-            logger.debug(f"{Color.BLUE}[时间戳同步] {md_path} 的时间戳已与 {ipynb_path} 同步{Color.RESET}")
+            # 写入Markdown文件，内容未变化时只同步时间戳
+            self.write_if_changed(md_path, self.encode_text(md_content), (access_time, modify_time))
+            logger.debug("%s[时间戳同步] %s 的时间戳已与 %s 同步%s", Color.BLUE, md_path, ipynb_path, Color.RESET)
             
             logger.info(f"{Color.BLUE}转换成功: {md_path}{Color.RESET}")
             return md_path
             
         except Exception as e:
+            if isinstance(e, FileNotFoundError):
+                # 目标目录可能已被删除，清空缓存以便下次重新创建
+                _ensure_parent.cache_clear()
             logger.error(f"{Color.RED}转换失败 IPYNB → MD: {ipynb_path} → {md_path}, 错误: {e}{Color.RESET}")
             raise
     
+    def encode_text(self, text):
+        """将文本编码为写入文件的字节，换行符与文本模式写入保持一致
+        
+        Args:
+            text (str): 文本内容
+            
+        Returns:
+            bytes: UTF-8编码的内容
+        """
+        if os.linesep != '\n':
+            text = text.replace('\n', os.linesep)
+        return text.encode('utf-8')
+    
+    def write_if_changed(self, path, data, times):
+        """内容有变化时才写入目标文件，之后设置其时间戳
+        
+        内容相同时跳过写入，避免时间戳不一致的相同文件反复触发同步
+        
+        Args:
+            path (Path): 目标文件路径
+            data (bytes): 要写入的内容
+            times (tuple): 目标文件的(访问时间, 修改时间)
+            
+        Returns:
+            bool: 是否实际写入了文件
+        """
+        path_str = str(path)
+        digest = _content_hash(data)
+        
+        try:
+            st = os.stat(path_str)
+        except FileNotFoundError:
+            st = None
+        
+        unchanged = False
+        if st is not None and st.st_size == len(data):
+            cached = self._hash_cache.get(path_str)
+            if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+                unchanged = cached[2] == digest
+            else:
+                # 目标文件不是由本进程写入的，读取后比较
+                with open(path_str, 'rb') as f:
+                    unchanged = _content_hash(f.read()) == digest
+        
+        if not unchanged:
+            try:
+                with open(path_str, 'wb') as f:
+                    f.write(data)
+            except FileNotFoundError:
+                # 目标目录在运行期间被删除，缓存的目录检查已失效：清空缓存，重新创建目录后重试一次
+                _ensure_parent.cache_clear()
+                ensure_dir_exists(os.path.dirname(path_str))
+                with open(path_str, 'wb') as f:
+                    f.write(data)
+        else:
+            logger.info(f"{Color.GRAY}[内容未变化] 跳过写入，仅同步时间戳: {path}{Color.RESET}")
+        
+        os.utime(path_str, times)
+        st = os.stat(path_str)
+        self._hash_cache[path_str] = (st.st_mtime_ns, st.st_size, digest)
+        return not unchanged
+    
+    def load_notebook_streaming(self, f):
+        """流式解析Jupyter Notebook
+        
+        逐个读取单元格，未开启保留输出时直接跳过outputs，
+        大段的输出数据（如base64图片）不会被载入内存
+        
+        Args:
+            f: 以二进制模式打开的Notebook文件对象
+            
+        Returns:
+            dict: Jupyter Notebook对象
+        """
+        notebook = {}
+        for key, value in json_stream.load(f).items():
+            if key != 'cells':
+                notebook[key] = json_stream.to_standard_types(value)
+                continue
+                
+            cells = []
+            for cell in value:
+                cells.append({
+                    cell_key: json_stream.to_standard_types(cell_value)
+                    for cell_key, cell_value in cell.items()
+                    if self.preserve_output or cell_key != 'outputs'
+                })
+            notebook['cells'] = cells
+            
+        return notebook
+    
     def parse_md_to_cells(self, md_content):
         """解析Markdown内容，创建Jupyter Notebook单元格
         
@@ -202,52 +380,54 @@ class Converter:
         """
         cells = []
         
-        # 使用正则表达式查找代码块和普通文本
-        pattern = r'```(\w*)([\s\S]*?)```'
-        
-        # 分割文本
-        parts = re.split(pattern, md_content)
-        
-        # 初始位置
-        current_pos = 0
-        
-        # 处理每个部分
-        i = 0
-        while i < len(parts):
-            if i % 3 == 0:
-                # 这是普通文本部分
-                text = parts[i]
-                if text.strip():
-                    cells.append({
-                        'cell_type': 'markdown',
-                        'metadata': {},
-                        'source': self.prepare_cell_source(text)
-                    })
-                i += 1
-            else:
-                # 这是代码块部分
-                lang = parts[i].strip() or self.default_language
-                code = parts[i + 1]
-                
-                # 创建代码单元格
-                cell = {
-                    'cell_type': 'code',
-                    'execution_count': None,
-                    'metadata': {
-                        'trusted': True
-                    },
-                    'source': self.prepare_cell_source(code),
-                    'outputs': []
-                }
-                
-                # 设置语言
-                if lang == 'python' or lang == 'py':
-                    pass  # 默认已经设置为Python
-                else:
-                    cell['metadata']['language'] = lang
+        # 线性扫描```围栏，只在代码块边界处切分字符串
+        pos = 0
+        length = len(md_content)
+        while pos <= length:
+            fence = md_content.find('```', pos)
+            close = md_content.find('```', fence + 3) if fence >= 0 else -1
+            
+            # 代码块之前的普通文本（没有完整代码块时为剩余全部文本）
+            text = md_content[pos:fence if close >= 0 else length]
+            if text.strip():
+                cells.append({
+                    'cell_type': 'markdown',
+                    'metadata': {},
+                    'source': self.prepare_cell_source(text)
+                })
+            
+            if close < 0:
+                break
                 
-                cells.append(cell)
-                i += 2
+            # 开始围栏所在行的剩余部分为语言标识，之后直到结束围栏为代码
+            newline = md_content.find('\n', fence + 3, close)
+            if newline < 0:
+                lang = ''
+                code = md_content[fence + 3:close]
+            else:
+                lang = md_content[fence + 3:newline].strip()
+                code = md_content[newline + 1:close]
+            lang = lang or self.default_language
+            
+            # 创建代码单元格
+            cell = {
+                'cell_type': 'code',
+                'execution_count': None,
+                'metadata': {
+                    'trusted': True
+                },
+                'source': self.prepare_cell_source(code),
+                'outputs': []
+            }
+            
+            # 设置语言
+            if lang == 'python' or lang == 'py':
+                pass  # 默认已经设置为Python
+            else:
+                cell['metadata']['language'] = lang
+            
+            cells.append(cell)
+            pos = close + 3
         
         return cells
     
@@ -284,7 +464,7 @@ class Converter:
                 else:
                     notebook_language = kernel_language
         
-        logger.debug(f"{Color.BLUE}[语言检测] 从Notebook获取的语言: {notebook_language}{Color.RESET}")
+        logger.debug("%s[语言检测] 从Notebook获取的语言: %s%s", Color.BLUE, notebook_language, Color.RESET)
         
         # 处理每个单元格
         for cell in notebook.get('cells', []):
@@ -321,7 +501,7 @@ class Converter:
                             text = output.get('text', [])
                             if isinstance(text, list):
                                 text = ''.join(text)
-                            outputs.append(f"# {name}:\n# {text.replace(chr(10), chr(10)+'# ')}")
+                            outputs.append('# ' + name + ':\n# ' + text.replace(_NL, _NL_HASH))
                             
                         elif output_type in ('execute_result', 'display_data'):
                             if 'data' in output:
@@ -330,7 +510,7 @@ class Converter:
                                     text = data['text/plain']
                                     if isinstance(text, list):
                                         text = ''.join(text)
-                                    outputs.append(f"# Output:\n# {text.replace(chr(10), chr(10)+'# ')}")
+                                    outputs.append('# Output:\n# ' + text.replace(_NL, _NL_HASH))
                         
                         elif output_type == 'error':
                             ename = output.get('ename', '')
@@ -382,25 +562,9 @@ class Converter:
         if not code_block.strip():
             return self.default_language
             
-        # Python特征
-        if re.search(r'import\s+[\w.]+|def\s+\w+\s*\(|class\s+\w+\s*:', code_block):
-            return 'python'
-            
-        # JavaScript特征
-        if re.search(r'var\s+\w+|let\s+\w+|const\s+\w+|function\s+\w+\s*\(|=>\s*{', code_block):
-            return 'javascript'
-            
-        # Java特征
-        if re.search(r'public\s+class|private\s+\w+|protected\s+\w+', code_block):
-            return 'java'
-            
-        # C/C++特征
-        if re.search(r'#include\s+[<"]|int\s+main\s*\(', code_block):
-            return 'cpp'
-            
-        # Bash特征
-        if re.search(r'^#!/bin/bash|^\s*for\s+\w+\s+in\s+|^\s*if\s+\[\[', code_block):
-            return 'bash'
+        for language, pattern in _LANG_PATTERNS:
+            if pattern.search(code_block):
+                return language
             
         # 默认返回Python
         return self.default_language
@@ -6,18 +6,97 @@
 
 import os
 import time
+import atexit
+import weakref
+import logging
 import stat
-from pathlib import Path
-from collections import defaultdict
+import heapq
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from watchdog.events import FileSystemEventHandler
 from watchdog.observers.polling import PollingObserver  # 添加轮询观察者
 
-from .utils import logger, Color, is_markdown_file, is_notebook_file
+from .utils import logger, Color
+
+# 缓存日志级别检查函数，热路径上先判断级别再格式化调试日志
+_DEBUG = logger.isEnabledFor
+
+# 轮询时关注的文件后缀
+_WATCH_SUFFIXES = ('.md', '.ipynb')
+
+# 原生文件事件不可靠、需要回退到轮询的文件系统类型（网络文件系统及WSL挂载的Windows磁盘）
+NETWORK_FS_TYPES = {'nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', '9p', 'drvfs', 'fuse.sshfs', 'afs', 'ceph', 'glusterfs'}
+
+_mounts = None
+
+def _is_network_fs(path):
+    """判断路径是否位于网络文件系统或WSL挂载的Windows磁盘上
+    
+    Args:
+        path (str|Path): 要检查的路径
+        
+    Returns:
+        bool: 是否需要使用轮询监控
+    """
+    global _mounts
+    if _mounts is None:
+        # 只读取一次挂载表，按挂载点长度降序排列，便于找到最近的挂载点
+        _mounts = []
+        try:
+            with open('/proc/mounts', 'r', encoding='utf-8') as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) >= 3:
+                        mount_point = fields[1].replace('\\040', ' ')
+                        _mounts.append((mount_point, fields[2]))
+        except OSError:
+            pass  # 非Linux系统没有/proc/mounts
+        _mounts.sort(key=lambda m: len(m[0]), reverse=True)
+    
+    real_path = os.path.realpath(path)
+    for mount_point, fs_type in _mounts:
+        if real_path == mount_point or real_path.startswith(mount_point.rstrip('/') + '/'):
+            return fs_type in NETWORK_FS_TYPES
+    return False
+
+class _PendingEvent:
+    """去抖动队列中的待处理事件"""
+    
+    __slots__ = ('first_seen', 'last_seen', 'type', 'path', 'due')
+    
+    def __init__(self, timestamp, event_type, path):
+        """初始化待处理事件
+        
+        Args:
+            timestamp (float): 首次收到事件的时间
+            event_type (str): 事件类型
+            path (str): 文件路径
+        """
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.type = event_type
+        self.path = path
+        self.due = timestamp
+
 
 class SyncFileHandler(FileSystemEventHandler):
     """处理文件系统事件，转发给同步引擎"""
     
+    # 绑定常用颜色，避免每个事件重复查找Color属性
+    _CYAN = Color.CYAN
+    _GREEN = Color.GREEN
+    _GRAY = Color.GRAY
+    _RESET = Color.RESET
+    
+    # 文件后缀对应的日志标签
+    _SUFFIX_LABELS = {'.md': 'MD', '.ipynb': 'IPYNB'}
+    
+    # 已处理删除事件记录的最大条数
+    PROCESSED_DELETES_MAX = 4096
+    
     def __init__(self, sync_engine):
         """初始化文件处理器
         
@@ -25,8 +104,8 @@ class SyncFileHandler(FileSystemEventHandler):
             sync_engine: 同步引擎实例
         """
         self.engine = sync_engine
-        # 跟踪已被处理的删除事件，避免重复处理
-        self.processed_deletes = set()
+        # 跟踪已被处理的删除事件，避免重复处理；作为LRU使用，超出上限时淘汰最早的记录
+        self.processed_deletes = OrderedDict()
         self.last_event_time = time.time()
         
     def dispatch(self, event):
@@ -35,13 +114,14 @@ class SyncFileHandler(FileSystemEventHandler):
         Args:
             event: 文件系统事件
         """
-        current_time = time.time()
-        # 记录时间以便调试
-        path = event.src_path if hasattr(event, 'src_path') else "未知路径"
-        event_type = event.event_type if hasattr(event, 'event_type') else "未知事件"
-        
-        logger.debug(f"{Color.MAGENTA}[原始事件] 接收到事件 {event_type}: {path} ({current_time - self.last_event_time:.3f}秒前){Color.RESET}")
-        self.last_event_time = current_time
+        if _DEBUG(logging.DEBUG):
+            current_time = time.time()
+            # 记录时间以便调试
+            path = event.src_path if hasattr(event, 'src_path') else "未知路径"
+            event_type = event.event_type if hasattr(event, 'event_type') else "未知事件"
+            
+            logger.debug("%s[原始事件] 接收到事件 %s: %s (%.3f秒前)%s", Color.MAGENTA, event_type, path, current_time - self.last_event_time, self._RESET)
+            self.last_event_time = current_time
         
         # 调用父类方法继续处理
         super().dispatch(event)
@@ -54,15 +134,17 @@ class SyncFileHandler(FileSystemEventHandler):
         """
         if not event.is_directory:
             path = event.src_path
-            logger.debug(f"{Color.CYAN}[文件修改] 检测到文件修改: {path}{Color.RESET}")
+            # 文件重新出现，之后的删除事件需要再次处理
+            self.processed_deletes.pop(path, None)
+            if _DEBUG(logging.DEBUG):
+                logger.debug("%s[文件修改] 检测到文件修改: %s%s", self._CYAN, path, self._RESET)
             
             # 特别检查是否为ipynb或md文件
-            if path.endswith('.ipynb'):
-                logger.info(f"{Color.GREEN}[IPYNB修改] 检测到IPYNB文件修改: {path}{Color.RESET}")
-            elif path.endswith('.md'):
-                logger.info(f"{Color.GREEN}[MD修改] 检测到MD文件修改: {path}{Color.RESET}")
+            label = self._SUFFIX_LABELS.get(os.path.splitext(path)[1])
+            if label:
+                logger.info("%s[%s修改] 检测到%s文件修改: %s%s", self._GREEN, label, label, path, self._RESET)
             
-            self.engine.handle_file_event(Path(path), "modified")
+            self.engine.handle_file_event(path, "modified")
     
     def on_created(self, event):
         """处理文件创建事件
@@ -72,15 +154,16 @@ class SyncFileHandler(FileSystemEventHandler):
         """
         if not event.is_directory:
             path = event.src_path
-            logger.debug(f"{Color.CYAN}[文件创建] 检测到文件创建: {path}{Color.RESET}")
+            self.processed_deletes.pop(path, None)
+            if _DEBUG(logging.DEBUG):
+                logger.debug("%s[文件创建] 检测到文件创建: %s%s", self._CYAN, path, self._RESET)
             
             # 特别检查是否为ipynb或md文件
-            if path.endswith('.ipynb'):
-                logger.info(f"{Color.GREEN}[IPYNB创建] 检测到IPYNB文件创建: {path}{Color.RESET}")
-            elif path.endswith('.md'):
-                logger.info(f"{Color.GREEN}[MD创建] 检测到MD文件创建: {path}{Color.RESET}")
+            label = self._SUFFIX_LABELS.get(os.path.splitext(path)[1])
+            if label:
+                logger.info("%s[%s创建] 检测到%s文件创建: %s%s", self._GREEN, label, label, path, self._RESET)
                 
-            self.engine.handle_file_event(Path(path), "created")
+            self.engine.handle_file_event(path, "created")
     
     def on_moved(self, event):
         """处理文件移动事件
@@ -90,15 +173,16 @@ class SyncFileHandler(FileSystemEventHandler):
         """
         if not event.is_directory:
             dest_path = event.dest_path
-            logger.debug(f"{Color.CYAN}[文件移动] 检测到文件移动: {event.src_path} -> {dest_path}{Color.RESET}")
+            self.processed_deletes.pop(dest_path, None)
+            if _DEBUG(logging.DEBUG):
+                logger.debug("%s[文件移动] 检测到文件移动: %s -> %s%s", self._CYAN, event.src_path, dest_path, self._RESET)
             
             # 特别检查是否为ipynb或md文件
-            if dest_path.endswith('.ipynb'):
-                logger.info(f"{Color.GREEN}[IPYNB移动] 检测到IPYNB文件移动: {event.src_path} -> {dest_path}{Color.RESET}")
-            elif dest_path.endswith('.md'):
-                logger.info(f"{Color.GREEN}[MD移动] 检测到MD文件移动: {event.src_path} -> {dest_path}{Color.RESET}")
+            label = self._SUFFIX_LABELS.get(os.path.splitext(dest_path)[1])
+            if label:
+                logger.info("%s[%s移动] 检测到%s文件移动: %s -> %s%s", self._GREEN, label, label, event.src_path, dest_path, self._RESET)
                 
-            self.engine.handle_file_event(Path(dest_path), "moved")
+            self.engine.handle_file_event(dest_path, "moved")
             
     def on_deleted(self, event):
         """处理文件删除事件
@@ -107,46 +191,56 @@ class SyncFileHandler(FileSystemEventHandler):
             event: 文件系统事件
         """
         if not event.is_directory:
-            path = Path(event.src_path)
-            path_str = str(path)
+            path = path_str = event.src_path
             
-            logger.debug(f"{Color.CYAN}[文件删除] 检测到文件删除: {path}{Color.RESET}")
+            if _DEBUG(logging.DEBUG):
+                logger.debug("%s[文件删除] 检测到文件删除: %s%s", self._CYAN, path, self._RESET)
             
             # 特别检查是否为ipynb或md文件
-            if path_str.endswith('.ipynb'):
-                logger.info(f"{Color.GREEN}[IPYNB删除] 检测到IPYNB文件删除: {path}{Color.RESET}")
-            elif path_str.endswith('.md'):
-                logger.info(f"{Color.GREEN}[MD删除] 检测到MD文件删除: {path}{Color.RESET}")
+            label = self._SUFFIX_LABELS.get(os.path.splitext(path_str)[1])
+            if label:
+                logger.info("%s[%s删除] 检测到%s文件删除: %s%s", self._GREEN, label, label, path, self._RESET)
             
             # 避免重复处理同一个删除事件
             if path_str in self.processed_deletes:
-                logger.debug(f"{Color.GRAY}[跳过] 重复的删除事件: {path}{Color.RESET}")
+                if _DEBUG(logging.DEBUG):
+                    logger.debug("%s[跳过] 重复的删除事件: %s%s", self._GRAY, path, self._RESET)
                 return
                 
-            logger.info(f"{Color.CYAN}[检测到删除] {path}{Color.RESET}")
+            logger.info("%s[检测到删除] %s%s", self._CYAN, path, self._RESET)
             
             # 标记为已处理
-            self.processed_deletes.add(path_str)
+            self.remember_delete(path_str)
+            
+            # 删除事件不经过同步引擎的去抖动，需在此清除该路径的记录，
+            # 否则紧随其后的重新创建事件会被当作重复事件丢弃，导致对应文件被误删
+            self.engine.forget_event(path_str)
             
             try:
-                # 添加到事件队列，设置短延迟使删除优先处理
-                current_time = time.time()
-                self.engine.file_watcher.pending_events[path_str] = {
-                    'timestamp': current_time - self.engine.file_watcher.debounce_delay + 0.1, 
-                    'type': "deleted", 
-                    'path': path
-                }
+                # 添加到事件队列，删除事件会被优先处理
+                self.engine.file_watcher.add_pending_event(path, "deleted")
                 logger.info(f"{Color.YELLOW}[加入队列] 删除事件已加入队列: {path}{Color.RESET}")
             except Exception as e:
                 logger.error(f"{Color.RED}[处理失败] 删除事件处理失败: {path}, 错误: {e}{Color.RESET}")
                 # 从已处理集合中移除，以便下次重试
-                self.processed_deletes.discard(path_str)
+                self.processed_deletes.pop(path_str, None)
+
+    def remember_delete(self, path_str):
+        """记录已处理的删除事件，超出上限时淘汰最早的记录
+        
+        Args:
+            path_str (str): 被删除的文件路径
+        """
+        self.processed_deletes[path_str] = None
+        self.processed_deletes.move_to_end(path_str)
+        if len(self.processed_deletes) > self.PROCESSED_DELETES_MAX:
+            self.processed_deletes.popitem(last=False)
 
     def handle_delete_directly(self, path):
         """直接处理删除事件，绕过事件队列
         
         Args:
-            path (Path): 被删除的文件路径
+            path (str|Path): 被删除的文件路径
         """
         logger.info(f"{Color.YELLOW}[直接处理] 立即处理删除事件: {path}{Color.RESET}")
         try:
@@ -164,14 +258,18 @@ class FileWatcher:
         Args:
             sync_engine: 同步引擎实例
         """
-        self.sync_engine = sync_engine
+        # 同步引擎也持有监控器的引用，这里使用弱引用避免循环引用
+        self._engine_ref = weakref.ref(sync_engine)
         self.config = sync_engine.config
         self.md_dir = self.config.get_md_dir()
         self.ipynb_dir = self.config.get_ipynb_dir()
+        # 目录路径前缀（以分隔符结尾），用于判断文件属于哪个目录，避免/a/b误匹配/a/bb
+        self._dir_prefix = {d: str(d).rstrip(os.sep) + os.sep for d in (self.md_dir, self.ipynb_dir)}
         self.observer = None
         self.ipynb_observer = None  # 为ipynb文件夹单独创建一个观察器
-        self.handler = None  # 存储处理器引用
-        self.ipynb_handler = None  # 存储ipynb处理器引用
+        self.handler = None  # 存储处理器引用，两个目录共用同一个处理器
+        self.force_polling = self.config.get('force_polling', False)
+        self.polled_dirs = []  # 使用轮询监控的目录
         
         # 确保目录存在
         self.md_dir.mkdir(parents=True, exist_ok=True)
@@ -180,50 +278,83 @@ class FileWatcher:
         elif not self.ipynb_dir.is_dir():
             raise NotADirectoryError(f"{self.ipynb_dir} 已存在但不是目录！")
         
-        # 事件队列，用于去抖动处理
-        self.pending_events = defaultdict(lambda: {'timestamp': 0, 'type': None, 'path': None})
+        # 事件队列，用于去抖动处理，按路径去重
+        self.pending_events = {}
+        # 到期时间堆，元素为(到期时间, 序号, 路径)，过期条目在出堆时跳过
+        self._due_heap = []
+        self._due_seq = 0
+        self._pending_lock = threading.Lock()
+        # 新事件到达时唤醒主循环，与事件队列共用同一把锁
+        self._wakeup = threading.Condition(self._pending_lock)
         self.debounce_delay = self.config.get('debounce_delay', 0.8)
+        self.debounce_max_wait = self.config.get('debounce_max_wait', 5.0)
         
-        # 上次清理时间
-        self.last_cleanup_time = time.time()
-        self.cleanup_interval = 60  # 60秒清理一次
+        # 事件消费线程池：到期的变更事件交给线程池转换，主循环只负责出队，不被转换阻塞
+        self.event_workers = self.config.get('event_workers', 4)
+        self._executor = None
         
-        # 文件状态缓存，用于轮询检查
+        # 文件状态缓存，用于轮询检查，值为((修改时间ns, 大小), 扫描代数)
         self.file_states = {}
+        self._gen = 0
+        self.parallel_scan = self.config.get('parallel_scan', True)  # 启动时是否并行扫描子目录
         self.last_poll_time = time.time()
         self.poll_interval = 2.0  # 轮询间隔（秒）
         
         logger.info(f"{Color.BLUE}已初始化文件监控器, MD目录: {self.md_dir}, IPYNB目录: {self.ipynb_dir}{Color.RESET}")
     
+    @property
+    def sync_engine(self):
+        """同步引擎实例"""
+        return self._engine_ref()
+    
     def start(self):
         """启动文件监控"""
         if self.observer:
             return
             
-        # 创建事件处理器
+        # 创建事件处理器，两个观察者共用，删除事件去重也因此跨目录生效
         self.handler = SyncFileHandler(self.sync_engine)
-        self.ipynb_handler = SyncFileHandler(self.sync_engine)  # 为ipynb创建单独的处理器
         
-        # 为MD文件夹也使用轮询观察者，以确保在WSL环境中也能工作
-        self.observer = PollingObserver()
-        logger.info(f"{Color.GREEN}开始监控目录(轮询): {self.md_dir} (含子目录){Color.RESET}")
+        # 默认使用原生事件观察者，网络文件系统/WSL或强制轮询时使用轮询观察者
+        self.polled_dirs = []
+        self.observer = self.create_observer(self.md_dir)
         self.observer.schedule(self.handler, str(self.md_dir), recursive=True)
         
-        # 为IPYNB文件夹使用轮询观察者，以确保在WSL环境中也能工作
-        self.ipynb_observer = PollingObserver()
-        logger.info(f"{Color.GREEN}开始监控目录(轮询): {self.ipynb_dir} (含子目录){Color.RESET}")
-        self.ipynb_observer.schedule(self.ipynb_handler, str(self.ipynb_dir), recursive=True)
+        self.ipynb_observer = self.create_observer(self.ipynb_dir)
+        self.ipynb_observer.schedule(self.handler, str(self.ipynb_dir), recursive=True)
         
-        # 启动观察者
+        # 启动事件消费线程池和观察者
+        self._executor = ThreadPoolExecutor(max_workers=self.event_workers, thread_name_prefix='synctool-sync')
         self.observer.start()
         self.ipynb_observer.start()
+        # 解释器退出时确保停止监控
+        atexit.register(self.stop)
         logger.info(f"{Color.BLUE}文件监控已启动{Color.RESET}")
         
         # 初始化文件状态
         self.scan_files_state()
     
+    def create_observer(self, directory):
+        """为目录选择合适的观察者
+        
+        Args:
+            directory (Path): 要监控的目录
+            
+        Returns:
+            观察者实例
+        """
+        if self.force_polling or _is_network_fs(directory):
+            self.polled_dirs.append(directory)
+            logger.info(f"{Color.GREEN}开始监控目录(轮询): {directory} (含子目录){Color.RESET}")
+            return PollingObserver()
+        
+        logger.info(f"{Color.GREEN}开始监控目录: {directory} (含子目录){Color.RESET}")
+        return Observer()
+    
     def stop(self):
         """停止文件监控"""
+        atexit.unregister(self.stop)
+        
         if self.observer:
             self.observer.stop()
             self.observer.join()
@@ -233,18 +364,46 @@ class FileWatcher:
             self.ipynb_observer.stop()
             self.ipynb_observer.join()
             self.ipynb_observer = None
+        
+        # 取消尚未开始的转换，并等待正在执行的转换完成，避免退出时留下写了一半的文件
+        if self._executor:
+            try:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+            except TypeError:
+                # Python 3.9 之前不支持 cancel_futures
+                self._executor.shutdown(wait=True)
+            self._executor = None
             
         logger.info(f"{Color.YELLOW}文件监控已停止{Color.RESET}")
     
     def scan_files_state(self):
-        """扫描并记录所有文件的状态"""
+        """扫描并记录所有轮询目录的文件状态"""
+        if not self.polled_dirs:
+            return
+        
         logger.debug(f"{Color.GRAY}[扫描] 开始扫描文件状态{Color.RESET}")
         
-        # 扫描MD文件夹
-        self.scan_directory_state(self.md_dir)
+        if not self.parallel_scan:
+            for directory in self.polled_dirs:
+                self.scan_directory_state(directory)
+            logger.debug("%s[扫描] 已记录 %d 个文件状态%s", Color.GRAY, len(self.file_states), Color.RESET)
+            return
         
-        # 扫描IPYNB文件夹
-        self.scan_directory_state(self.ipynb_dir)
+        # 先扫描各目录的顶层文件，再把顶层子目录交给线程池并行扫描（os.stat会释放GIL）
+        subdirs = []
+        for directory in self.polled_dirs:
+            self.file_states.update(self.collect_states(directory, subdirs))
+        
+        if subdirs:
+            max_workers = min(8, os.cpu_count() or 1, len(subdirs))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(self.collect_states, subdirs))
+            
+            # 各线程只返回自己的结果，在当前线程统一合并
+            for states in results:
+                self.file_states.update(states)
+        
+        logger.debug("%s[扫描] 已记录 %d 个文件状态%s", Color.GRAY, len(self.file_states), Color.RESET)
     
     def scan_directory_state(self, directory):
         """扫描目录中的文件状态
@@ -252,22 +411,65 @@ class FileWatcher:
         Args:
             directory (Path): 要扫描的目录
         """
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if file.endswith('.md') or file.endswith('.ipynb'):
-                    try:
-                        stat_info = os.stat(file_path)
-                        self.file_states[file_path] = {
-                            'mtime': stat_info.st_mtime,
-                            'size': stat_info.st_size
-                        }
-                        logger.debug(f"{Color.GRAY}[扫描] 记录文件状态: {file_path}{Color.RESET}")
-                    except Exception as e:
-                        logger.error(f"{Color.RED}[错误] 获取文件状态失败: {file_path}, 错误: {e}{Color.RESET}")
+        self.file_states.update(self.collect_states(directory))
+    
+    def collect_states(self, directory, subdirs=None):
+        """收集目录中的文件状态
+        
+        Args:
+            directory (str|Path): 要扫描的目录
+            subdirs (list, optional): 如果提供，子目录不递归扫描，而是追加到该列表
+            
+        Returns:
+            dict: 文件路径到((修改时间ns, 大小), 扫描代数)的映射
+        """
+        states = {}
+        for file_path, stat_info in self.walk_files(directory, subdirs):
+            states[file_path] = ((stat_info.st_mtime_ns, stat_info.st_size), self._gen)
+        return states
+    
+    def walk_files(self, directory, subdirs=None):
+        """递归遍历目录，产出需要监控的文件及其状态
+        
+        跳过以.或~开头的隐藏/临时文件和目录，且在获取文件状态前先检查后缀
+        
+        Args:
+            directory (str|Path): 要遍历的目录
+            subdirs (list, optional): 如果提供，子目录不递归遍历，而是追加到该列表
+            
+        Yields:
+            tuple: (文件路径, os.stat_result)
+        """
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.warning(f"{Color.YELLOW}[警告] 无法扫描目录: {directory}, 错误: {e}{Color.RESET}")
+            return
+        
+        for entry in entries:
+            name = entry.name
+            if name[0] in '.~':
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if subdirs is None:
+                        yield from self.walk_files(entry.path)
+                    else:
+                        subdirs.append(entry.path)
+                elif name.endswith(_WATCH_SUFFIXES):
+                    yield entry.path, entry.stat()
+            except FileNotFoundError:
+                continue  # 遍历过程中文件被删除
+            except OSError as e:
+                logger.error(f"{Color.RED}[错误] 获取文件状态失败: {entry.path}, 错误: {e}{Color.RESET}")
     
     def check_files_changes(self):
-        """检查文件是否有变化"""
+        """检查轮询目录中的文件是否有变化"""
+        # 原生事件观察者已经实时上报变化，无需手动轮询
+        if not self.polled_dirs:
+            return
+        
         current_time = time.time()
         if current_time - self.last_poll_time < self.poll_interval:
             return
@@ -275,35 +477,34 @@ class FileWatcher:
         self.last_poll_time = current_time
         logger.debug(f"{Color.GRAY}[轮询] 检查文件变化{Color.RESET}")
         
-        # 检查ipynb目录的文件
-        changed_files_ipynb = self.check_directory_changes(self.ipynb_dir)
-        
-        # 检查md目录的文件
-        changed_files_md = self.check_directory_changes(self.md_dir)
-        
-        # 合并变化文件列表
-        changed_files = changed_files_ipynb + changed_files_md
+        # 检查各轮询目录的文件并合并变化文件列表
+        changed_files = []
+        for directory in self.polled_dirs:
+            changed_files.extend(self.check_directory_changes(directory))
         
-        # 处理变化的文件
+        # 处理变化的文件，整批交给同步引擎
+        processed_deletes = self.handler.processed_deletes
+        batch = []
         for file_path, change_type in changed_files:
-            # 处理ipynb和md文件
-            if file_path.endswith('.ipynb') or file_path.endswith('.md'):
-                logger.info(f"{Color.GREEN}[检测变化] {change_type} 文件: {file_path}{Color.RESET}")
-                # 创建一个合成事件
-                event = FileSystemEvent(file_path)
-                event.event_type = change_type
-                event.is_directory = False
-                
-                # 根据文件类型选择合适的处理器
-                handler = self.ipynb_handler if file_path.endswith('.ipynb') else self.handler
-                
-                # 手动触发处理器
-                if change_type == 'modified':
-                    handler.on_modified(event)
-                elif change_type == 'created':
-                    handler.on_created(event)
-                elif change_type == 'deleted':
-                    handler.on_deleted(event)
+            logger.info(f"{Color.GREEN}[检测变化] {change_type} 文件: {file_path}{Color.RESET}")
+            
+            # 与事件处理器共用删除记录，避免同一删除被观察者和轮询重复处理
+            if change_type == 'deleted':
+                if file_path in processed_deletes:
+                    continue
+                self.handler.remember_delete(file_path)
+            else:
+                processed_deletes.pop(file_path, None)
+            
+            batch.append((file_path, change_type))
+        
+        if not batch:
+            return
+        sync_engine = self.sync_engine
+        if sync_engine is not None:
+            sync_engine.handle_events_batch(batch)
+        else:
+            self.add_pending_events(batch)
     
     def check_directory_changes(self, directory):
         """检查目录中的文件变化
@@ -314,38 +515,31 @@ class FileWatcher:
         Returns:
             list: 变化的文件列表
         """
+        # 使用原生事件观察者的目录无需轮询
+        if directory not in self.polled_dirs:
+            return []
+        
         changed_files = []
-        current_files = {}
-        
-        # 扫描当前文件
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if file.endswith('.md') or file.endswith('.ipynb'):
-                    try:
-                        stat_info = os.stat(file_path)
-                        current_files[file_path] = {
-                            'mtime': stat_info.st_mtime,
-                            'size': stat_info.st_size
-                        }
-                    except FileNotFoundError:
-                        continue
-        
-        # 检查新增或修改的文件
-        for file_path, state in current_files.items():
-            if file_path not in self.file_states:
+        file_states = self.file_states
+        
+        # 每次检查使用新的扫描代数，扫描时直接更新状态缓存并记录新增或修改的文件
+        self._gen += 1
+        gen = self._gen
+        for file_path, stat_info in self.walk_files(directory):
+            key = (stat_info.st_mtime_ns, stat_info.st_size)
+            old_state = file_states.get(file_path)
+            if old_state is None:
                 changed_files.append((file_path, 'created'))
-            elif state['mtime'] > self.file_states[file_path]['mtime'] or state['size'] != self.file_states[file_path]['size']:
+            elif old_state[0] != key:
                 changed_files.append((file_path, 'modified'))
+            file_states[file_path] = (key, gen)
         
-        # 检查删除的文件
-        for file_path in list(self.file_states.keys()):
-            if file_path.startswith(str(directory)) and file_path not in current_files:
-                changed_files.append((file_path, 'deleted'))
-                del self.file_states[file_path]
-        
-        # 更新状态缓存
-        self.file_states.update(current_files)
+        # 本目录下未在本次扫描中出现的文件即为已删除
+        prefix = self._dir_prefix[directory]
+        deleted = [path for path, state in file_states.items() if state[1] != gen and path.startswith(prefix)]
+        for file_path in deleted:
+            changed_files.append((file_path, 'deleted'))
+            del file_states[file_path]
         
         return changed_files
     
@@ -353,102 +547,130 @@ class FileWatcher:
         """添加待处理事件到去抖动队列
         
         Args:
-            file_path (Path): 文件路径
+            file_path (str|Path): 文件路径，队列内部统一使用字符串
             event_type (str): 事件类型
         """
-        path_str = str(file_path)
-        current_time = time.time()
-        
-        # 检查这是Markdown还是Jupyter文件
-        is_md = is_markdown_file(path_str)
-        is_ipynb = is_notebook_file(path_str)
+        self.add_pending_events(((file_path, event_type),))
+    
+    def add_pending_events(self, events):
+        """批量添加待处理事件到去抖动队列，整批只加锁和唤醒一次
         
-        if not (is_md or is_ipynb):
-            logger.debug(f"{Color.GRAY}[忽略] 忽略非目标文件类型: {file_path}{Color.RESET}")
-            return
+        Args:
+            events (iterable): (文件路径, 事件类型)元组序列
+        """
+        current_time = time.monotonic()
+        queued = []
         
-        # 删除事件特殊处理，设置更低的延迟
-        if event_type == "deleted":
-            # 删除事件使用更短的延迟(几乎立即处理)
-            self.pending_events[path_str] = {
-                'timestamp': current_time - self.debounce_delay + 0.1,  # 几乎立即处理
-                'type': event_type, 
-                'path': file_path
-            }
-            logger.debug(f"{Color.YELLOW}[优先事件队列] {event_type:10s} {file_path} (优先处理){Color.RESET}")
-        else:
-            # 其他事件正常处理
-            self.pending_events[path_str] = {
-                'timestamp': current_time, 
-                'type': event_type, 
-                'path': file_path
-            }
-            logger.debug(f"{Color.GRAY}[事件队列] {event_type:10s} {file_path}{Color.RESET}")
+        with self._pending_lock:
+            for file_path, event_type in events:
+                path_str = str(file_path)
+                
+                # 检查这是Markdown还是Jupyter文件，只需比较末尾6个字符（不区分大小写）
+                if not path_str[-6:].lower().endswith(_WATCH_SUFFIXES):
+                    if _DEBUG(logging.DEBUG):
+                        logger.debug("%s[忽略] 忽略非目标文件类型: %s%s", Color.GRAY, file_path, Color.RESET)
+                    continue
+                
+                event_info = self.pending_events.get(path_str)
+                if event_info is None:
+                    event_info = _PendingEvent(current_time, event_type, path_str)
+                    self.pending_events[path_str] = event_info
+                else:
+                    # 同一路径的事件合并：以最新事件为准，但创建事件不会被随后的修改事件覆盖
+                    event_info.last_seen = current_time
+                    event_info.path = path_str
+                    if not (event_info.type == "created" and event_type == "modified"):
+                        event_info.type = event_type
+                
+                if event_info.type == "deleted":
+                    # 删除事件使用更短的延迟(几乎立即处理)
+                    event_info.due = current_time + 0.1
+                else:
+                    # 安静一段时间后处理，持续写入的文件最迟在debounce_max_wait后处理
+                    event_info.due = min(current_time + self.debounce_delay,
+                                         event_info.first_seen + self.debounce_max_wait)
+                
+                heapq.heappush(self._due_heap, (event_info.due, self._due_seq, path_str))
+                self._due_seq += 1
+                queued.append((path_str, event_type))
+            
+            if queued:
+                self._wakeup.notify()
+        
+        if _DEBUG(logging.DEBUG):
+            for path_str, event_type in queued:
+                if event_type == "deleted":
+                    logger.debug("%s[优先事件队列] %-10s %s (优先处理)%s", Color.YELLOW, event_type, path_str, Color.RESET)
+                else:
+                    logger.debug("%s[事件队列] %-10s %s%s", Color.GRAY, event_type, path_str, Color.RESET)
     
-    def cleanup_processed_deletes(self):
-        """清理过期的已处理删除事件记录"""
-        current_time = time.time()
-        if current_time - self.last_cleanup_time > self.cleanup_interval and self.handler:
-            logger.debug(f"{Color.GRAY}[清理] 清理过期的删除事件记录{Color.RESET}")
-            if self.handler:
-                self.handler.processed_deletes.clear()
-            if self.ipynb_handler:
-                self.ipynb_handler.processed_deletes.clear()
-            self.last_cleanup_time = current_time
+    def wait_for_events(self, timeout):
+        """阻塞等待，直到有新事件加入队列、最早的待处理事件到期或超时
+        
+        Args:
+            timeout (float): 最长等待时间（秒）
+        """
+        with self._wakeup:
+            if self._due_heap:
+                timeout = min(timeout, max(0, self._due_heap[0][0] - time.monotonic()))
+            self._wakeup.wait(timeout)
     
     def process_pending_events(self):
         """处理去抖动后的待处理事件"""
-        current_time = time.time()
-        processed_paths = []
-        
         # 检查文件变化（基于轮询）
         self.check_files_changes()
         
+        # 从到期时间堆中取出所有已到期的事件，处理过程中出错也不会重试
+        ready_events = []
+        current_time = time.monotonic()
+        with self._pending_lock:
+            while self._due_heap and self._due_heap[0][0] <= current_time:
+                due, _, path_str = heapq.heappop(self._due_heap)
+                event_info = self.pending_events.get(path_str)
+                # 事件已被处理或到期时间已更新，跳过过期的堆条目
+                if event_info is None or event_info.due != due:
+                    continue
+                del self.pending_events[path_str]
+                ready_events.append(event_info)
+        
+        if not ready_events:
+            return
+        
         try:
-            # 创建待处理事件的副本，避免在循环中修改原字典
-            pending_events_copy = dict(self.pending_events)
-            
-            for path_str, event_info in pending_events_copy.items():
-                # 只处理超过去抖动延迟的事件
-                if current_time - event_info['timestamp'] >= self.debounce_delay:
-                    path = event_info['path']
-                    event_type = event_info['type']
-                    
-                    logger.debug(f"{Color.CYAN}[处理事件] {event_type:10s} {path}{Color.RESET}")
-                    
-                    try:
-                        # 分别处理不同类型的事件
-                        if event_type == "deleted":
-                            logger.info(f"{Color.RED}[处理删除] 处理文件删除: {path}{Color.RESET}")
-                            self.sync_engine.handle_file_deletion(path)
-                        else:
-                            logger.info(f"{Color.GREEN}[处理变更] 处理文件变更: {path}{Color.RESET}")
-                            self.sync_engine.sync_file_if_needed(path)
-                        
-                        processed_paths.append(path_str)
-                    except Exception as e:
-                        logger.error(f"{Color.RED}[事件处理错误] 处理事件 {event_type} 失败: {path}, 错误: {e}{Color.RESET}")
-                        import traceback
-                        logger.debug(f"{Color.RED}[详细错误] {traceback.format_exc()}{Color.RESET}")
-                        # 尽管出错，仍将其标记为已处理以避免无限重试
-                        processed_paths.append(path_str)
+            # 按事件类型分组，每类事件一次性提交给同步引擎
+            to_delete = []
+            to_sync = []
+            for event_info in ready_events:
+                path = event_info.path
+                event_type = event_info.type
+                
+                if _DEBUG(logging.DEBUG):
+                    logger.debug("%s[处理事件] %-10s %s%s", Color.CYAN, event_type, path, Color.RESET)
+                
+                if event_type == "deleted":
+                    logger.info(f"{Color.RED}[处理删除] 处理文件删除: {path}{Color.RESET}")
+                    to_delete.append(path)
+                else:
+                    logger.info(f"{Color.GREEN}[处理变更] 处理文件变更: {path}{Color.RESET}")
+                    to_sync.append(path)
             
-            # 移除已处理的事件
-            for path_str in processed_paths:
-                if path_str in self.pending_events:  # 确保键存在再删除
-                    self.pending_events.pop(path_str, None)
+            sync_engine = self.sync_engine
+            # 删除只是unlink，直接处理；转换较慢，交给消费线程池，同一对文件由同步引擎的锁串行化
+            if to_delete:
+                sync_engine.handle_file_deletions(to_delete)
+            if to_sync:
+                if self._executor is None:
+                    sync_engine.sync_files_if_needed(to_sync)
+                else:
+                    # 按线程数切分为若干批，每个线程处理一批
+                    workers = min(self.event_workers, len(to_sync))
+                    for i in range(workers):
+                        self._executor.submit(sync_engine.sync_files_if_needed, to_sync[i::workers])
                 
-        except RuntimeError as e:
-            logger.error(f"{Color.RED}[字典错误] 处理事件时字典发生变化: {e}{Color.RESET}")
-            # 在发生字典大小变化错误时，简单清空待处理事件
-            self.pending_events.clear()
         except Exception as e:
             logger.error(f"{Color.RED}[事件循环错误] 处理事件队列失败: {e}{Color.RESET}")
-            import traceback
-            logger.debug(f"{Color.RED}[详细错误] {traceback.format_exc()}{Color.RESET}")
-            
-        # 定期清理过期的已处理删除事件记录
-        self.cleanup_processed_deletes()
+            if _DEBUG(logging.DEBUG):
+                logger.debug("%s[详细错误] %s%s", Color.RED, traceback.format_exc(), Color.RESET)
     
     def should_sync_file(self, file_path):
         """检查文件是否应该同步
@@ -459,21 +681,16 @@ class FileWatcher:
         Returns:
             bool: 是否应该同步
         """
-        # 检查文件是否存在
-        if not file_path.exists():
-            return False
-            
-        # 检查是否是隐藏文件或临时文件
+        # 先做字符串检查，只有可能需要同步的文件才访问文件系统
         filename = file_path.name
-        if filename.startswith('.') or filename.startswith('~') or filename.endswith('.tmp'):
+        
+        # 检查是否是隐藏文件或临时文件
+        if not filename or filename[0] in '.~' or filename.endswith('.tmp'):
             return False
             
-        # 检查扩展名
-        if is_markdown_file(str(file_path)) or is_notebook_file(str(file_path)):
-            return True
+        # 检查扩展名（不区分大小写）
+        if not filename[-6:].lower().endswith(_WATCH_SUFFIXES):
+            return False
             
-        return False
-    
-    def __del__(self):
-        """析构函数，确保停止监控"""
-        self.stop()
+        # 检查文件是否存在
+        return file_path.exists()
@@ -5,11 +5,11 @@
 """
 
 import os
-import sys
-import time
 import signal
+import threading
 import argparse
 import logging
+import traceback
 from pathlib import Path
 
 from .utils import logger, Color
@@ -57,19 +57,25 @@ def parse_arguments():
     
     return parser.parse_args()
 
-def setup_signal_handlers(file_watcher):
+def setup_signal_handlers():
     """设置信号处理器
     
-    Args:
-        file_watcher: 文件监控器实例
+    信号处理器只设置停止标志，由主循环负责调用 stop()，
+    避免在处理器中获取主线程可能已持有的锁而造成死锁。
+    
+    Returns:
+        threading.Event: 收到中断信号时被置位的停止标志
     """
+    stop_requested = threading.Event()
+    
     def signal_handler(sig, frame):
         logger.info(f"{Color.YELLOW}接收到中断信号，正在停止...{Color.RESET}")
-        file_watcher.stop()
-        sys.exit(0)
+        stop_requested.set()
         
     signal.signal(signal.SIGINT, signal_handler)  # Ctrl+C
     signal.signal(signal.SIGTERM, signal_handler)  # 终止信号
+    
+    return stop_requested
 
 def main():
     """主函数"""
@@ -119,7 +125,7 @@ def main():
     sync_engine.set_file_watcher(file_watcher)
     
     # 设置信号处理器
-    setup_signal_handlers(file_watcher)
+    stop_requested = setup_signal_handlers()
     
     # 执行一致性检查
     if args.check_only:
@@ -159,22 +165,21 @@ def main():
     try:
         # 主循环
         logger.info(f"{Color.GREEN}进入监控循环，按Ctrl+C退出{Color.RESET}")
-        while True:
+        while not stop_requested.is_set():
             try:
                 # 处理待处理的事件
                 file_watcher.process_pending_events()
             except Exception as e:
                 logger.error(f"{Color.RED}事件处理出错，但监控将继续: {e}{Color.RESET}")
-                import traceback
-                logger.debug(f"{Color.RED}[详细错误] {traceback.format_exc()}{Color.RESET}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("%s[详细错误] %s%s", Color.RED, traceback.format_exc(), Color.RESET)
             
-            # 睡眠一段时间，避免CPU占用过高
-            time.sleep(config_manager.get('watch_interval', 1.0))
+            # 等待新事件或最早的待处理事件到期，空闲时不占用CPU
+            file_watcher.wait_for_events(config_manager.get('watch_interval', 1.0))
     except KeyboardInterrupt:
         logger.info(f"{Color.YELLOW}接收到键盘中断，正在停止...{Color.RESET}")
     except Exception as e:
         logger.error(f"{Color.RED}程序发生错误: {e}{Color.RESET}")
-        import traceback
         logger.error(f"{Color.RED}[详细错误] {traceback.format_exc()}{Color.RESET}")
     finally:
         # 停止文件监控
@@ -7,12 +7,46 @@
 import os
 import time
 import shutil
-from pathlib import Path
-from datetime import datetime
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
-from .utils import logger, Color, is_markdown_file, is_notebook_file, ensure_dir_exists, get_relative_path
+from .utils import logger, Color, stat_file, classify, KIND_MD, KIND_OTHER
 from .converter import Converter
 
+# 颜色代码在导入后不再变化，绑定为模块常量，省去每条日志的属性查找
+_RED = Color.RED
+_GREEN = Color.GREEN
+_YELLOW = Color.YELLOW
+_BLUE = Color.BLUE
+_CYAN = Color.CYAN
+_GRAY = Color.GRAY
+_RESET = Color.RESET
+_colorize = Color.colorize
+
+# 批量删除孤立文件时的最大线程数
+_UNLINK_WORKERS = 16
+
+def _safe_unlink(path):
+    """删除文件，文件已不存在时视为成功
+    
+    Args:
+        path (str): 文件路径
+        
+    Returns:
+        bool: 文件是否已被删除或本就不存在
+    """
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.error(_colorize(f"[错误] 删除文件时出错: {path}, 错误: {e}", _RED))
+        return False
+    return True
+
 class SyncEngine:
     """同步引擎类"""
     
@@ -28,14 +62,74 @@ class SyncEngine:
         self.converter = Converter(config_manager)
         self.md_dir = self.config.get_md_dir()
         self.ipynb_dir = self.config.get_ipynb_dir()
+        # 目录路径前缀（以分隔符结尾），用字符串前缀判断文件是否位于目录中，避免/a/b误匹配/a/bb
+        # 不做resolve()：监控事件中的路径同样未解析符号链接，解析后反而可能匹配不上
+        self._md_prefix = str(self.md_dir).rstrip(os.sep) + os.sep
+        self._ipynb_prefix = str(self.ipynb_dir).rstrip(os.sep) + os.sep
         
-        # 跟踪已同步的文件，避免循环同步
-        self.recently_synced = set()
+        # 跟踪已同步的目标文件，避免循环同步
+        # 键为(路径, 修改时间ns, 大小)，值为写入时间；文件再次变化后键不再匹配
+        self.recently_synced = {}
         self.sync_timeout = 5  # 同步超时时间（秒）
+        self.recently_synced_max = 256  # 超过该数量时清理过期记录
+        self._recent_lock = threading.Lock()  # 初始同步时多个线程会同时记录
+        
+        # 每对MD/IPYNB文件一把锁，避免同一对文件被并发的事件同时转换而损坏目标文件
+        self._pair_locks = {}
+        self._pair_locks_guard = threading.Lock()
+        
+        # 事件去抖动：记录每个路径最近一次被接受的事件时间，窗口内的重复事件直接丢弃
+        self._last_seen = {}
+        # 合并窗口不得超过 debounce_delay，否则同一文件的后续修改会在下一批次中被误当作重复事件丢弃
+        self._debounce_window = min(self.config.get('debounce_ms', 300) / 1000.0,
+                                    self.config.get('debounce_delay', 0.8))
+        self._last_prune = time.monotonic()
+        
+        # 冲突解决策略在启动时解析为可调用对象，事件处理时直接调用
+        self._should_sync_to_ipynb = self._build_conflict_strategy('md', 'IPYNB')
+        self._should_sync_to_md = self._build_conflict_strategy('ipynb', 'MD')
         
         # 文件监控器，后续初始化
         self.file_watcher = None
         
+    def _build_conflict_strategy(self, source_kind, target_label):
+        """根据conflict_resolution配置构建目标文件已存在时的判断函数
+        
+        Args:
+            source_kind (str): 源文件类型（md或ipynb），与配置值对应
+            target_label (str): 目标文件类型的日志名称
+            
+        Returns:
+            callable: 参数为(源路径, 目标路径, 源状态, 目标状态)，返回是否执行同步
+        """
+        conflict_resolution = self.config.get('conflict_resolution', 'newer')
+        
+        if conflict_resolution in ('md', 'ipynb') and conflict_resolution != source_kind:
+            # 总是优先使用目标文件
+            def prefer_target(source_path, target_path, source_stat, target_stat):
+                logger.info(_colorize(f"[跳过] 配置优先使用{target_label}: {target_path}", _YELLOW))
+                return False
+            return prefer_target
+        
+        if conflict_resolution == 'newer':
+            # 如果时间差小于配置的阈值，则认为文件相同，不需要同步
+            threshold_ns = int(self.config.get('time_threshold', 3) * 1000000000)  # 默认3秒
+            
+            def prefer_newer(source_path, target_path, source_stat, target_stat):
+                # 比较修改时间（纳秒整数），使用较新的文件
+                diff_ns = source_stat.mtime_ns - target_stat.mtime_ns
+                if abs(diff_ns) < threshold_ns:
+                    logger.info(_colorize(f"[跳过] 文件时间戳相近(差异{abs(diff_ns) / 1e9:.2f}秒): {source_path} ↔ {target_path}", _YELLOW))
+                    return False
+                if diff_ns < 0:
+                    logger.info(_colorize(f"[跳过] {target_label}文件较新: {target_path} (领先{-diff_ns / 1e9:.2f}秒)", _YELLOW))
+                    return False
+                return True
+            return prefer_newer
+        
+        # 总是优先使用源文件（包括未知的策略值）
+        return lambda source_path, target_path, source_stat, target_stat: True
+    
     def set_file_watcher(self, file_watcher):
         """设置文件监控器
         
@@ -48,10 +142,13 @@ class SyncEngine:
         """处理文件事件
         
         Args:
-            file_path (Path): 文件路径
+            file_path (str|Path): 文件路径
             event_type (str): 事件类型（created, modified, moved, deleted）
         """
-        logger.info(f"{Color.CYAN}[事件] {event_type:10s} {file_path}{Color.RESET}")
+        if not self._accept_event(str(file_path), event_type, time.monotonic()):
+            return
+        
+        logger.info(_colorize(f"[事件] {event_type:10s} {file_path}", _CYAN))
         
         # 将事件添加到文件监控器的待处理队列
         if self.file_watcher:
@@ -63,257 +160,416 @@ class SyncEngine:
             else:
                 self.sync_file_if_needed(file_path)
     
+    def handle_events_batch(self, events):
+        """批量处理文件事件
+        
+        同一路径的多个事件先合并为最后一个，再统一去抖动，
+        最后一次性提交给文件监控器的待处理队列
+        
+        Args:
+            events (iterable): (文件路径, 事件类型)元组序列
+        """
+        # 按路径分组，保留首次出现的顺序，事件类型以最后一个为准
+        latest = {}
+        for file_path, event_type in events:
+            latest[str(file_path)] = event_type
+        
+        now = time.monotonic()
+        accepted = [(path_str, event_type) for path_str, event_type in latest.items()
+                    if self._accept_event(path_str, event_type, now)]
+        if not accepted:
+            return
+        
+        logger.info(_colorize(f"[事件] 批量接收 {len(accepted)} 个事件", _CYAN))
+        
+        if self.file_watcher:
+            self.file_watcher.add_pending_events(accepted)
+        else:
+            # 如果文件监控器未初始化，直接处理
+            self.handle_file_deletions([p for p, t in accepted if t == "deleted"])
+            self.sync_files_if_needed([p for p, t in accepted if t != "deleted"])
+    
+    def _accept_event(self, path_str, event_type, now):
+        """事件去抖动：判断事件是否需要处理
+        
+        Args:
+            path_str (str): 文件路径
+            event_type (str): 事件类型
+            now (float): 当前时间（time.monotonic）
+            
+        Returns:
+            bool: 是否处理该事件，窗口内的重复事件返回False
+        """
+        if event_type == "deleted":
+            # 删除事件总是处理，并清除记录，使文件重新出现时的事件不会被丢弃
+            self.forget_event(path_str)
+        else:
+            # 编辑器保存时会对同一路径连续触发多个事件，窗口内只保留第一个
+            if now - self._last_seen.get(path_str, -self._debounce_window) < self._debounce_window:
+                logger.debug("%s[去抖动] 合并重复事件 %s: %s%s", _GRAY, event_type, path_str, _RESET)
+                return False
+            self._last_seen[path_str] = now
+        
+        # 定期清理过期的记录，避免无限增长
+        if now - self._last_prune > self._debounce_window * 10:
+            self._prune_last_seen(now)
+        return True
+    
+    def forget_event(self, path_str):
+        """清除路径的去抖动记录，删除事件不经过handle_file_event时由调用方调用
+        
+        文件被删除后立即重新创建时，创建事件不会因去抖动被丢弃
+        
+        Args:
+            path_str (str): 文件路径
+        """
+        self._last_seen.pop(path_str, None)
+    
+    def _prune_last_seen(self, now):
+        """清理超过10个去抖动窗口未再出现的路径记录
+        
+        Args:
+            now (float): 当前时间（time.monotonic）
+        """
+        expire_before = now - self._debounce_window * 10
+        # 观察者线程和轮询线程会同时写入，先整体复制再遍历，避免遍历中字典大小变化
+        for path_str, ts in list(self._last_seen.items()):
+            if ts < expire_before:
+                self._last_seen.pop(path_str, None)
+        self._last_prune = now
+    
     def handle_file_deletion(self, file_path):
         """处理文件删除事件
         
         Args:
-            file_path (Path): 被删除的文件路径
+            file_path (str|Path): 被删除的文件路径
         """
         try:
+            # 与sync_file_if_needed相同，只做字符串运算，不创建Path对象
+            file_path = path_str = os.fspath(file_path)
+            
             # 确定文件是MD还是IPYNB
-            is_md = is_markdown_file(str(file_path))
-            is_ipynb = is_notebook_file(str(file_path))
+            kind = classify(path_str)
             
-            if not (is_md or is_ipynb):
-                logger.debug(f"{Color.GRAY}[跳过] 忽略非目标文件类型: {file_path}{Color.RESET}")
+            if kind == KIND_OTHER:
+                logger.debug("%s[跳过] 忽略非目标文件类型: %s%s", _GRAY, file_path, _RESET)
                 return
                 
-            # 确定对应的目标文件
-            if is_md:
+            # 确定对应的目标文件：去掉目录前缀和扩展名，拼到另一个目录下
+            if kind == KIND_MD:
                 # 被删除的是MD文件，找到对应的IPYNB文件
-                rel_path = get_relative_path(file_path, self.md_dir)
-                target_path = self.ipynb_dir / Path(rel_path).with_suffix('.ipynb')
+                if not path_str.startswith(self._md_prefix):
+                    logger.debug("%s[跳过] MD文件不在配置的目录中: %s%s", _GRAY, file_path, _RESET)
+                    return
+                rel_stem = path_str[len(self._md_prefix):-3]
+                md_path = path_str
+                target_path = self._ipynb_prefix + rel_stem + '.ipynb'
             else:
                 # 被删除的是IPYNB文件，找到对应的MD文件
-                rel_path = get_relative_path(file_path, self.ipynb_dir)
-                target_path = self.md_dir / Path(rel_path).with_suffix('.md')
+                if not path_str.startswith(self._ipynb_prefix):
+                    logger.debug("%s[跳过] IPYNB文件不在配置的目录中: %s%s", _GRAY, file_path, _RESET)
+                    return
+                rel_stem = path_str[len(self._ipynb_prefix):-6]
+                md_path = target_path = self._md_prefix + rel_stem + '.md'
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s[路径转换] %s 对应的目标文件为 %s%s", _GRAY, file_path, target_path, _RESET)
             
-            # 如果目标文件存在且配置允许删除对应文件
-            if target_path.exists() and self.config.get('delete_orphaned', False):
-                logger.info(f"{Color.RED}[删除] 删除对应的目标文件: {target_path}{Color.RESET}")
-                try:
-                    target_path.unlink()  # 删除目标文件
-                except FileNotFoundError:
-                    logger.warning(f"{Color.YELLOW}[注意] 文件已不存在: {target_path}{Color.RESET}")
-                except PermissionError:
-                    logger.error(f"{Color.RED}[错误] 没有权限删除文件: {target_path}{Color.RESET}")
-                except Exception as e:
-                    logger.error(f"{Color.RED}[错误] 删除文件时出错: {target_path}, 错误: {e}{Color.RESET}")
-            else:
-                logger.info(f"{Color.YELLOW}[保留] 目标文件未删除: {target_path}{Color.RESET}")
+            # 如果目标文件存在且配置允许删除对应文件，与这对文件的同步操作互斥
+            with self._pair_lock(md_path):
+                if os.path.exists(target_path) and self.config.get('delete_orphaned', False):
+                    logger.info(_colorize(f"[删除] 删除对应的目标文件: {target_path}", _RED))
+                    try:
+                        os.unlink(target_path)  # 删除目标文件
+                    except FileNotFoundError:
+                        logger.warning(_colorize(f"[注意] 文件已不存在: {target_path}", _YELLOW))
+                    except PermissionError:
+                        logger.error(_colorize(f"[错误] 没有权限删除文件: {target_path}", _RED))
+                    except Exception as e:
+                        logger.error(_colorize(f"[错误] 删除文件时出错: {target_path}, 错误: {e}", _RED))
+                else:
+                    logger.info(_colorize(f"[保留] 目标文件未删除: {target_path}", _YELLOW))
                 
         except Exception as e:
-            logger.error(f"{Color.RED}[错误] 处理删除事件出错: {file_path}, 错误: {e}{Color.RESET}")
+            logger.error(_colorize(f"[错误] 处理删除事件出错: {file_path}, 错误: {e}", _RED))
             # 记录详细的错误信息以便调试
-            import traceback
-            logger.debug(f"{Color.RED}[详细错误] {traceback.format_exc()}{Color.RESET}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s[详细错误] %s%s", _RED, traceback.format_exc(), _RESET)
     
     def sync_file_if_needed(self, file_path):
         """如果需要，同步文件
         
         Args:
-            file_path (Path): 文件路径
+            file_path (str|Path): 文件路径
         """
-        file_path = Path(file_path)
-        path_str = str(file_path)
+        # 热路径上只做字符串运算，不创建Path对象
+        file_path = path_str = os.fspath(file_path)
         
-        # 检查文件是否存在
-        if not file_path.exists():
-            logger.debug(f"{Color.GRAY}[跳过] 文件不存在: {file_path}{Color.RESET}")
+        # 检查文件是否存在，获取的状态会传给后续的同步步骤
+        file_stat = stat_file(path_str)
+        if not file_stat.exists:
+            logger.debug("%s[跳过] 文件不存在: %s%s", _GRAY, file_path, _RESET)
             return
             
-        # 检查是否是最近同步的文件
-        if path_str in self.recently_synced:
-            current_time = time.time()
-            # 从集合中移除，避免无限增长
-            self.recently_synced.remove(path_str)
-            logger.debug(f"{Color.GRAY}[跳过] 最近同步过的文件: {file_path}{Color.RESET}")
-            return
+        # 检查是否是最近同步写入且之后未再变化的文件
+        key = (path_str, file_stat.mtime_ns, file_stat.size)
+        # 记录只使用一次：取出即删除，单次哈希查找且在GIL下是原子操作
+        synced_at = self.recently_synced.pop(key, None)
+        if synced_at is not None:
+            if time.monotonic() - synced_at < self.sync_timeout:
+                logger.debug("%s[跳过] 最近同步过的文件: %s%s", _GRAY, file_path, _RESET)
+                return
             
         # 检查文件类型
-        is_md = is_markdown_file(path_str)
-        is_ipynb = is_notebook_file(path_str)
+        kind = classify(path_str)
         
-        if not (is_md or is_ipynb):
-            logger.debug(f"{Color.GRAY}[跳过] 不支持的文件类型: {file_path}{Color.RESET}")
+        if kind == KIND_OTHER:
+            logger.debug("%s[跳过] 不支持的文件类型: %s%s", _GRAY, file_path, _RESET)
             return
             
         try:
             # 根据文件类型决定同步方向
-            if is_md:
+            if kind == KIND_MD:
                 # 从MD到IPYNB的同步
-                source_dir = self.md_dir
-                target_dir = self.ipynb_dir
-                
                 # 检查文件是否在MD目录中
-                if self.md_dir in file_path.parents or self.md_dir == file_path.parent:
-                    rel_path = get_relative_path(file_path, source_dir)
-                    # 修复：确保rel_path是Path对象
-                    rel_path = Path(rel_path)
-                    target_path = target_dir / rel_path.with_suffix('.ipynb')
+                if path_str.startswith(self._md_prefix):
+                    # 去掉目录前缀即为相对路径，替换扩展名后拼到目标目录下
+                    rel_stem = path_str[len(self._md_prefix):-3]
+                    target_path = self._ipynb_prefix + rel_stem + '.ipynb'
                     
                     # 执行同步
-                    self.sync_md_to_ipynb(file_path, target_path)
+                    self.sync_md_to_ipynb(file_path, target_path, md_stat=file_stat)
                 else:
-                    logger.debug(f"{Color.GRAY}[跳过] MD文件不在配置的目录中: {file_path}{Color.RESET}")
+                    logger.debug("%s[跳过] MD文件不在配置的目录中: %s%s", _GRAY, file_path, _RESET)
                     
-            elif is_ipynb:
+            else:
                 # 从IPYNB到MD的同步
-                source_dir = self.ipynb_dir
-                target_dir = self.md_dir
-                
                 # 检查文件是否在IPYNB目录中
-                if self.ipynb_dir in file_path.parents or self.ipynb_dir == file_path.parent:
-                    rel_path = get_relative_path(file_path, source_dir)
-                    # 修复：确保rel_path是Path对象
-                    rel_path = Path(rel_path)
-                    target_path = target_dir / rel_path.with_suffix('.md')
+                if path_str.startswith(self._ipynb_prefix):
+                    rel_stem = path_str[len(self._ipynb_prefix):-6]
+                    target_path = self._md_prefix + rel_stem + '.md'
                     
                     # 执行同步
-                    self.sync_ipynb_to_md(file_path, target_path)
+                    self.sync_ipynb_to_md(file_path, target_path, ipynb_stat=file_stat)
                 else:
-                    logger.debug(f"{Color.GRAY}[跳过] IPYNB文件不在配置的目录中: {file_path}{Color.RESET}")
+                    logger.debug("%s[跳过] IPYNB文件不在配置的目录中: %s%s", _GRAY, file_path, _RESET)
         
         except Exception as e:
-            logger.error(f"{Color.RED}[错误] 同步失败: {file_path}, 错误: {e}{Color.RESET}")
+            logger.error(_colorize(f"[错误] 同步失败: {file_path}, 错误: {e}", _RED))
     
-    def sync_md_to_ipynb(self, md_path, ipynb_path):
-        """将MD文件同步到IPYNB文件
+    def handle_file_deletions(self, file_paths):
+        """批量处理文件删除事件
         
         Args:
-            md_path (Path): MD文件路径
-            ipynb_path (Path): 目标IPYNB文件路径
+            file_paths (list): 被删除的文件路径列表
         """
-        logger.info(f"{Color.GREEN}[同步] MD → IPYNB: {md_path} → {ipynb_path}{Color.RESET}")
+        for file_path in file_paths:
+            try:
+                self.handle_file_deletion(file_path)
+            except Exception as e:
+                logger.error(_colorize(f"[事件处理错误] 处理事件 deleted 失败: {file_path}, 错误: {e}", _RED))
+    
+    def sync_files_if_needed(self, file_paths):
+        """批量同步文件
         
-        # 确保目标目录存在
-        ensure_dir_exists(ipynb_path.parent)
+        Args:
+            file_paths (list): 需要检查同步的文件路径列表
+        """
+        for file_path in file_paths:
+            try:
+                self.sync_file_if_needed(file_path)
+            except Exception as e:
+                logger.error(_colorize(f"[事件处理错误] 同步文件失败: {file_path}, 错误: {e}", _RED))
+    
+    @contextmanager
+    def _pair_lock(self, md_path):
+        """获取一对MD/IPYNB文件的锁，同一对文件的同步和删除串行执行，不同文件对互不影响
         
-        # 检查目标文件是否存在，决定处理策略
-        if ipynb_path.exists():
-            # 根据配置决定是否覆盖
-            conflict_resolution = self.config.get('conflict_resolution', 'newer')
+        Args:
+            md_path (str|Path): 这对文件中MD文件的路径，去掉扩展名后作为锁的键
             
-            if conflict_resolution == 'md':
-                # 总是优先使用MD文件
-                pass  # 继续同步
-            elif conflict_resolution == 'ipynb':
-                # 总是优先使用IPYNB文件
-                logger.info(f"{Color.YELLOW}[跳过] 配置优先使用IPYNB: {ipynb_path}{Color.RESET}")
-                return
-            elif conflict_resolution == 'newer':
-                # 比较修改时间，使用较新的文件
-                md_mtime = datetime.fromtimestamp(md_path.stat().st_mtime)
-                ipynb_mtime = datetime.fromtimestamp(ipynb_path.stat().st_mtime)
-                
-                # 计算时间差的绝对值（秒）
-                time_diff = abs((md_mtime - ipynb_mtime).total_seconds())
-                
-                # 如果时间差小于配置的阈值，则认为文件相同，不需要同步
-                time_threshold = self.config.get('time_threshold', 3)  # 默认3秒
-                if time_diff < time_threshold:
-                    logger.info(f"{Color.YELLOW}[跳过] 文件时间戳相近(差异{time_diff:.2f}秒): {md_path} ↔ {ipynb_path}{Color.RESET}")
-                    return
-                
-                if ipynb_mtime > md_mtime:
-                    logger.info(f"{Color.YELLOW}[跳过] IPYNB文件较新: {ipynb_path} ({ipynb_mtime} > {md_mtime}){Color.RESET}")
-                    return
+        Yields:
+            bool: 是否因其他线程持有锁而等待过
+        """
+        key = os.path.splitext(os.fspath(md_path))[0]
+        with self._pair_locks_guard:
+            entry = self._pair_locks.get(key)
+            if entry is None:
+                entry = self._pair_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1  # 引用计数，没有线程使用时移除
+        
+        lock = entry[0]
+        waited = not lock.acquire(blocking=False)
+        if waited:
+            lock.acquire()
+        try:
+            yield waited
+        finally:
+            lock.release()
+            with self._pair_locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._pair_locks[key]
+    
+    def remember_synced(self, target_path):
+        """记录刚由同步写入的目标文件状态
+        
+        Args:
+            target_path (str|Path): 目标文件路径
+        """
+        try:
+            target_stat = os.stat(target_path)
+        except OSError:
+            return
+        key = (str(target_path), target_stat.st_mtime_ns, target_stat.st_size)
+        with self._recent_lock:
+            self.recently_synced[key] = time.monotonic()
+            self._gc_recent()
+    
+    def _gc_recent(self):
+        """记录过多时清理已过期的同步记录（调用方需持有_recent_lock）"""
+        if len(self.recently_synced) <= self.recently_synced_max:
+            return
+        expire_before = time.monotonic() - self.sync_timeout
+        # 先整体复制再遍历，读取方不加锁pop时也不会在遍历中改变字典大小
+        for key, ts in list(self.recently_synced.items()):
+            if ts < expire_before:
+                self.recently_synced.pop(key, None)
+    
+    def sync_md_to_ipynb(self, md_path, ipynb_path, md_stat=None, ipynb_stat=None):
+        """将MD文件同步到IPYNB文件
+        
+        Args:
+            md_path (str|Path): MD文件路径
+            ipynb_path (str|Path): 目标IPYNB文件路径
+            md_stat (FileStat, optional): 已获取的MD文件状态
+            ipynb_stat (FileStat, optional): 已获取的IPYNB文件状态
+        """
+        with self._pair_lock(md_path) as waited:
+            if waited:
+                # 等待期间其他线程可能已同步过这对文件，之前获取的状态已过时
+                md_stat = ipynb_stat = None
+            self._sync_md_to_ipynb(md_path, ipynb_path, md_stat, ipynb_stat)
+    
+    def _sync_md_to_ipynb(self, md_path, ipynb_path, md_stat, ipynb_stat):
+        """将MD文件同步到IPYNB文件（调用方需持有这对文件的锁）"""
+        logger.info(_colorize(f"[同步] MD → IPYNB: {md_path} → {ipynb_path}", _GREEN))
+        
+        if md_stat is None:
+            md_stat = stat_file(md_path)
+        if ipynb_stat is None:
+            ipynb_stat = stat_file(ipynb_path)
+        
+        # 目标文件已存在时按启动时确定的冲突策略决定是否覆盖
+        if ipynb_stat.exists and not self._should_sync_to_ipynb(md_path, ipynb_path, md_stat, ipynb_stat):
+            return
         
         # 执行转换
         try:
-            # 记录为最近同步的文件，避免循环同步
-            self.recently_synced.add(str(ipynb_path))
-            
             # 转换文件
             self.converter.md_to_ipynb(md_path, ipynb_path)
             
-            logger.info(f"{Color.BLUE}[完成] MD → IPYNB: {md_path} → {ipynb_path}{Color.RESET}")
+            # 记录为最近同步的文件，避免循环同步
+            self.remember_synced(ipynb_path)
+            
+            logger.info(_colorize(f"[完成] MD → IPYNB: {md_path} → {ipynb_path}", _BLUE))
         except Exception as e:
-            logger.error(f"{Color.RED}[失败] MD → IPYNB转换错误: {md_path} → {ipynb_path}, 错误: {e}{Color.RESET}")
+            logger.error(_colorize(f"[失败] MD → IPYNB转换错误: {md_path} → {ipynb_path}, 错误: {e}", _RED))
     
-    def sync_ipynb_to_md(self, ipynb_path, md_path):
+    def sync_ipynb_to_md(self, ipynb_path, md_path, ipynb_stat=None, md_stat=None):
         """将IPYNB文件同步到MD文件
         
         Args:
-            ipynb_path (Path): IPYNB文件路径
-            md_path (Path): 目标MD文件路径
+            ipynb_path (str|Path): IPYNB文件路径
+            md_path (str|Path): 目标MD文件路径
+            ipynb_stat (FileStat, optional): 已获取的IPYNB文件状态
+            md_stat (FileStat, optional): 已获取的MD文件状态
         """
-        logger.info(f"{Color.GREEN}[同步] IPYNB → MD: {ipynb_path} → {md_path}{Color.RESET}")
+        with self._pair_lock(md_path) as waited:
+            if waited:
+                # 等待期间其他线程可能已同步过这对文件，之前获取的状态已过时
+                ipynb_stat = md_stat = None
+            self._sync_ipynb_to_md(ipynb_path, md_path, ipynb_stat, md_stat)
+    
+    def _sync_ipynb_to_md(self, ipynb_path, md_path, ipynb_stat, md_stat):
+        """将IPYNB文件同步到MD文件（调用方需持有这对文件的锁）"""
+        logger.info(_colorize(f"[同步] IPYNB → MD: {ipynb_path} → {md_path}", _GREEN))
         
-        # 确保目标目录存在
-        ensure_dir_exists(md_path.parent)
+        if ipynb_stat is None:
+            ipynb_stat = stat_file(ipynb_path)
+        if md_stat is None:
+            md_stat = stat_file(md_path)
         
-        # 检查目标文件是否存在，决定处理策略
-        if md_path.exists():
-            # 根据配置决定是否覆盖
-            conflict_resolution = self.config.get('conflict_resolution', 'newer')
-            
-            if conflict_resolution == 'ipynb':
-                # 总是优先使用IPYNB文件
-                pass  # 继续同步
-            elif conflict_resolution == 'md':
-                # 总是优先使用MD文件
-                logger.info(f"{Color.YELLOW}[跳过] 配置优先使用MD: {md_path}{Color.RESET}")
-                return
-            elif conflict_resolution == 'newer':
-                # 比较修改时间，使用较新的文件
-                ipynb_mtime = datetime.fromtimestamp(ipynb_path.stat().st_mtime)
-                md_mtime = datetime.fromtimestamp(md_path.stat().st_mtime)
-                
-                # 计算时间差的绝对值（秒）
-                time_diff = abs((ipynb_mtime - md_mtime).total_seconds())
-                
-                # 如果时间差小于配置的阈值，则认为文件相同，不需要同步
-                time_threshold = self.config.get('time_threshold', 3)  # 默认3秒
-                if time_diff < time_threshold:
-                    logger.info(f"{Color.YELLOW}[跳过] 文件时间戳相近(差异{time_diff:.2f}秒): {ipynb_path} ↔ {md_path}{Color.RESET}")
-                    return
-                
-                if md_mtime > ipynb_mtime:
-                    logger.info(f"{Color.YELLOW}[跳过] MD文件较新: {md_path} ({md_mtime} > {ipynb_mtime}){Color.RESET}")
-                    return
+        # 目标文件已存在时按启动时确定的冲突策略决定是否覆盖
+        if md_stat.exists and not self._should_sync_to_md(ipynb_path, md_path, ipynb_stat, md_stat):
+            return
         
         # 执行转换
         try:
-            # 记录为最近同步的文件，避免循环同步
-            self.recently_synced.add(str(md_path))
-            
             # 转换文件
             self.converter.ipynb_to_md(ipynb_path, md_path)
             
-            logger.info(f"{Color.BLUE}[完成] IPYNB → MD: {ipynb_path} → {md_path}{Color.RESET}")
+            # 记录为最近同步的文件，避免循环同步
+            self.remember_synced(md_path)
+            
+            logger.info(_colorize(f"[完成] IPYNB → MD: {ipynb_path} → {md_path}", _BLUE))
         except Exception as e:
-            logger.error(f"{Color.RED}[失败] IPYNB → MD转换错误: {ipynb_path} → {md_path}, 错误: {e}{Color.RESET}")
+            logger.error(_colorize(f"[失败] IPYNB → MD转换错误: {ipynb_path} → {md_path}, 错误: {e}", _RED))
+    
+    def _dispatch_sync(self, src, tgt, direction):
+        """按方向执行一个初始同步操作
+        
+        Args:
+            src (str): 源文件路径
+            tgt (str): 目标文件路径
+            direction (str): 同步方向（md_to_ipynb或ipynb_to_md）
+        """
+        try:
+            if direction == 'md_to_ipynb':
+                self.sync_md_to_ipynb(src, tgt)
+            else:
+                self.sync_ipynb_to_md(src, tgt)
+        except Exception as e:
+            logger.error(_colorize(f"[失败] 初始同步错误: {src}, 错误: {e}", _RED))
     
     def perform_initial_sync(self):
         """执行初始同步，确保两个目录的一致性"""
         if not self.config.get('sync_on_start', True):
-            logger.info(f"{Color.YELLOW}[跳过] 初始同步已在配置中禁用{Color.RESET}")
+            logger.info(_colorize("[跳过] 初始同步已在配置中禁用", _YELLOW))
             return
             
-        logger.info(f"{Color.BLUE}[初始化] 执行初始同步...{Color.RESET}")
+        logger.info(_colorize("[初始化] 执行初始同步...", _BLUE))
         
         # 执行一致性检查
         sync_actions = self.consistency_checker.check_consistency()
         
-        # 执行MD到IPYNB的同步
-        for action in sync_actions['md_to_ipynb']:
-            self.sync_md_to_ipynb(action['source'], action['target'])
-            
-        # 执行IPYNB到MD的同步
-        for action in sync_actions['ipynb_to_md']:
-            self.sync_ipynb_to_md(action['source'], action['target'])
+        # 将两个方向的同步操作展开为平行的源路径、目标路径和方向数组，再交给线程池
+        srcs, tgts, dirs = [], [], []
+        for direction in ('md_to_ipynb', 'ipynb_to_md'):
+            for action in sync_actions[direction]:
+                srcs.append(str(action['source']))
+                tgts.append(str(action['target']))
+                dirs.append(direction)
+        
+        # 各文件对之间互不依赖，并行执行
+        if srcs:
+            max_workers = self.config.get('initial_sync_workers') or min(32, (os.cpu_count() or 1) * 4)
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(srcs))) as executor:
+                list(executor.map(self._dispatch_sync, srcs, tgts, dirs))
             
         # 处理孤立文件
         if self.config.get('delete_orphaned', False):
-            # 删除孤立的MD文件
+            orphans = sync_actions['orphaned_md'] + sync_actions['orphaned_ipynb']
             for path in sync_actions['orphaned_md']:
-                logger.info(f"{Color.RED}[删除] 孤立的MD文件: {path}{Color.RESET}")
-                Path(path).unlink(missing_ok=True)
-                
-            # 删除孤立的IPYNB文件
+                logger.info(_colorize(f"[删除] 孤立的MD文件: {path}", _RED))
             for path in sync_actions['orphaned_ipynb']:
-                logger.info(f"{Color.RED}[删除] 孤立的IPYNB文件: {path}{Color.RESET}")
-                Path(path).unlink(missing_ok=True)
+                logger.info(_colorize(f"[删除] 孤立的IPYNB文件: {path}", _RED))
+                
+            # 删除操作互不依赖，交给线程池并发执行
+            if orphans:
+                with ThreadPoolExecutor(max_workers=min(_UNLINK_WORKERS, len(orphans))) as executor:
+                    list(executor.map(_safe_unlink, orphans))
+        
+        # 记录同步后的文件状态，下次启动时跳过未变化的文件对
+        self.consistency_checker.save_cache(sync_actions)
         
-        logger.info(f"{Color.GREEN}[完成] 初始同步已完成{Color.RESET}")
+        logger.info(_colorize("[完成] 初始同步已完成", _GREEN))
@@ -6,14 +6,46 @@
 
 import os
 import sys
+import time
 import logging
 import platform
+from collections import namedtuple
+
+class _LogFormatter(logging.Formatter):
+    """日志格式化器
+    
+    INFO及以上级别使用带时间的完整格式，时间字符串按秒缓存，同一秒内的日志不再重复调用strftime；
+    DEBUG级别日志量大，使用不含时间的精简格式
+    """
+    
+    def __init__(self):
+        super().__init__(
+            fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S',
+            style='%'
+        )
+        self._debug_formatter = logging.Formatter('%(levelname)s - %(message)s', style='%')
+        self._time_cache = (None, '')  # (秒, 格式化后的时间)，作为整体替换以保证线程安全
+        
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        cached_second, cached_time = self._time_cache
+        if second != cached_second:
+            cached_time = time.strftime(datefmt or self.datefmt, self.converter(second))
+            self._time_cache = (second, cached_time)
+        return cached_time
+        
+    def format(self, record):
+        if record.levelno < logging.INFO:
+            return self._debug_formatter.format(record)
+        return super().format(record)
 
 # 配置日志
+_handler = logging.StreamHandler()
+_handler.setFormatter(_LogFormatter())
 logging.basicConfig(
     level=logging.INFO,  # 默认日志级别
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
+    handlers=[_handler]
 )
 
 # 创建日志记录器
@@ -35,20 +67,25 @@ class Color:
     CYAN = '\033[36m' if ENABLED else ''
     GRAY = '\033[90m' if ENABLED else ''
     
-    @staticmethod
-    def colorize(text, color):
-        """为文本添加颜色
-        
-        Args:
-            text (str): 要着色的文本
-            color (str): 颜色代码
+    # 根据是否启用颜色在导入时选定实现，禁用颜色时不做任何拼接
+    if ENABLED:
+        @staticmethod
+        def colorize(text, color, _reset=RESET):
+            """为文本添加颜色
             
-        Returns:
-            str: 着色后的文本
-        """
-        if Color.ENABLED:
-            return f"{color}{text}{Color.RESET}"
-        return text
+            Args:
+                text (str): 要着色的文本
+                color (str): 颜色代码
+                
+            Returns:
+                str: 着色后的文本
+            """
+            return color + text + _reset
+    else:
+        @staticmethod
+        def colorize(text, color):
+            """颜色已禁用，原样返回文本"""
+            return text
 
 def get_file_extension(file_path):
     """获取文件扩展名（不含点）
@@ -73,7 +110,7 @@ def is_markdown_file(file_path):
     ext = get_file_extension(file_path)
     result = ext == 'md'
     if result:
-        logger.debug(f"{Color.GRAY}[文件类型] 检测到Markdown文件: {file_path}{Color.RESET}")
+        logger.debug("%s[文件类型] 检测到Markdown文件: %s%s", Color.GRAY, file_path, Color.RESET)
     return result
 
 def is_notebook_file(file_path):
@@ -88,22 +125,29 @@ def is_notebook_file(file_path):
     ext = get_file_extension(file_path)
     result = ext == 'ipynb'
     if result:
-        logger.debug(f"{Color.GRAY}[文件类型] 检测到Jupyter Notebook文件: {file_path}{Color.RESET}")
+        logger.debug("%s[文件类型] 检测到Jupyter Notebook文件: %s%s", Color.GRAY, file_path, Color.RESET)
     return result
 
-def get_relative_path(path, base_path):
-    """获取相对路径
+# 文件类型常量，classify的返回值
+KIND_OTHER = 0
+KIND_MD = 1
+KIND_IPYNB = 2
+
+def classify(path_str):
+    """判断文件类型，只做一次小写转换和后缀比较
     
     Args:
-        path (str): 文件或目录绝对路径
-        base_path (str): 基准目录绝对路径
+        path_str (str): 文件路径
         
     Returns:
-        str: 相对路径
+        int: KIND_MD、KIND_IPYNB或KIND_OTHER
     """
-    rel_path = os.path.relpath(path, base_path)
-    logger.debug(f"{Color.GRAY}[路径转换] 将绝对路径 {path} 转换为相对路径 {rel_path} (相对于 {base_path}){Color.RESET}")
-    return rel_path
+    tail = path_str[-6:].lower()
+    if tail.endswith('.md'):
+        return KIND_MD
+    if tail == '.ipynb':
+        return KIND_IPYNB
+    return KIND_OTHER
 
 def ensure_dir_exists(directory):
     """确保目录存在，不存在则创建
@@ -115,4 +159,23 @@ def ensure_dir_exists(directory):
         os.makedirs(directory, exist_ok=True)
         logger.info(f"{Color.GREEN}创建目录: {directory}{Color.RESET}")
     else:
-        logger.debug(f"{Color.GRAY}[目录检查] 目录已存在: {directory}{Color.RESET}")
+        logger.debug("%s[目录检查] 目录已存在: %s%s", Color.GRAY, directory, Color.RESET)
+
+# 文件状态：是否存在、修改时间（纳秒）、大小
+FileStat = namedtuple('FileStat', ['exists', 'mtime_ns', 'size'])
+MISSING_STAT = FileStat(False, 0, 0)
+
+def stat_file(path):
+    """获取文件状态，只调用一次os.stat
+    
+    Args:
+        path (str|Path): 文件路径
+        
+    Returns:
+        FileStat: 文件状态，文件不存在时exists为False
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return MISSING_STAT
+    return FileStat(True, st.st_mtime_ns, st.st_size)